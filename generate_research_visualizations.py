@@ -37,9 +37,7 @@ ax1.axvline(x=0.95, color='red', linestyle='--', linewidth=2, label='95% Thresho
 ax1.legend()
 
 # Add value labels
-for i, (bar, val) in enumerate(zip(bars1, df['R²'])):
-    ax1.text(val + 0.01, bar.get_y() + bar.get_height()/2, 
-             f'{val:.4f}', va='center', fontweight='bold')
+ax1.bar_label(bars1, labels=[f'{v:.4f}' for v in df['R²']], padding=3, fontweight='bold')
 
 # Highlight best
 ax1.text(0.5, 4.3, '🏆 Best Model', fontsize=11, color='#10b981', fontweight='bold')
@@ -52,9 +50,7 @@ ax2.set_title('Root Mean Squared Error', fontsize=13, fontweight='bold')
 ax2.set_xlim(0, 36000)
 
 # Add value labels
-for i, (bar, val) in enumerate(zip(bars2, df['RMSE'])):
-    ax2.text(val + 500, bar.get_y() + bar.get_height()/2, 
-             f'${val:,.0f}', va='center', fontweight='bold')
+ax2.bar_label(bars2, labels=[f'${v:,.0f}' for v in df['RMSE']], padding=3, fontweight='bold')
 
 # Plot 3: MAE
 ax3 = axes[2]
@@ -64,9 +60,7 @@ ax3.set_title('Mean Absolute Error', fontsize=13, fontweight='bold')
 ax3.set_xlim(0, 18000)
 
 # Add value labels
-for i, (bar, val) in enumerate(zip(bars3, df['MAE'])):
-    ax3.text(val + 300, bar.get_y() + bar.get_height()/2, 
-             f'${val:,.0f}', va='center', fontweight='bold')
+ax3.bar_label(bars3, labels=[f'${v:,.0f}' for v in df['MAE']], padding=3, fontweight='bold')
 
 plt.tight_layout()
 
@@ -74,7 +68,7 @@ plt.tight_layout()
 reports_dir = Path('reports')
 reports_dir.mkdir(exist_ok=True)
 output_path = reports_dir / 'research_model_comparison.png'
-plt.savefig(output_path, dpi=300, bbox_inches='tight')
+plt.savefig(output_path, dpi=150, bbox_inches='tight')
 print(f"✓ Saved: {output_path}")
 
 # Create improvement visualization
@@ -88,11 +82,8 @@ colors_compare = ['#3b82f6', '#10b981']
 bars = ax.bar(models, r2_scores, color=colors_compare, edgecolor='black', linewidth=2, width=0.5)
 
 # Add value labels
-for bar, val in zip(bars, r2_scores):
-    height = bar.get_height()
-    ax.text(bar.get_x() + bar.get_width()/2, height + 0.001, 
-            f'{val:.4f}\n({val*100:.2f}%)',
-            ha='center', va='bottom', fontweight='bold', fontsize=12)
+ax.bar_label(bars, labels=[f'{v:.4f}\n({v*100:.2f}%)' for v in r2_scores],
+             padding=3, fontweight='bold', fontsize=12)
 
 # Add improvement annotation
 ax.annotate('', xy=(1, 0.9501), xytext=(0, 0.9455),
@@ -119,7 +110,7 @@ fig2.text(0.5, 0.02,
 
 plt.tight_layout()
 output_path2 = reports_dir / 'research_improvement_impact.png'
-plt.savefig(output_path2, dpi=300, bbox_inches='tight')
+plt.savefig(output_path2, dpi=150, bbox_inches='tight')
 print(f"✓ Saved: {output_path2}")
 
 print("\n" + "="*70)
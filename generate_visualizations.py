@@ -2,13 +2,16 @@
 Generate visualizations of model predictions
 """
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import numpy as np
 import pandas as pd
 import joblib
+import pyarrow.parquet as pq
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
 import matplotlib.pyplot as plt
+from matplotlib.ticker import FuncFormatter
 import seaborn as sns
 
 # Add project root to path
@@ -17,134 +20,96 @@ sys.path.insert(0, str(project_root))
 
 from src.config import DATA_PROCESSED_DIR, MODELS_DIR, REPORTS_DIR
 
-print("="*70)
-print("GENERATING PREDICTION VISUALIZATIONS")
-print("="*70)
-print()
-
-# Create reports directory
-REPORTS_DIR.mkdir(parents=True, exist_ok=True)
-
-# Load data and model
-print("Loading data and model...")
-df = pd.read_parquet(DATA_PROCESSED_DIR / 'merged.parquet')
-model = joblib.load(MODELS_DIR / 'best_model.pkl')
-
-# Prepare features
-target = 'avg_agi'
-exclude_cols = ['zipcode', 'state', 'state_fips', target]
-feature_cols = [col for col in df.columns if col not in exclude_cols]
-
-X = df[feature_cols].fillna(df[feature_cols].median())
-y = df[target]
+# Shared plot styling (applied once for all figures)
+sns.set_style("whitegrid")
+plt.rcParams['figure.figsize'] = (12, 8)
+K_FORMATTER = FuncFormatter(lambda x, _: f'${x/1000:.0f}K')
 
-# Make predictions
-print("Making predictions...")
-y_pred = model.predict(X)
 
-# Calculate metrics
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-mae = mean_absolute_error(y, y_pred)
-rmse = np.sqrt(mean_squared_error(y, y_pred))
-r2 = r2_score(y, y_pred)
+def save(fig, path):
+    """Save a figure and release it from the pyplot registry."""
+    fig.savefig(path, dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    print(f"✓ Saved: {path.name}")
 
-print(f"✓ Predictions complete")
-print(f"  MAE:  ${mae:,.2f}")
-print(f"  RMSE: ${rmse:,.2f}")
-print(f"  R²:   {r2:.4f}")
-print()
 
-# Set style
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (12, 8)
+def make_scatter(y, y_pred, r2, mae, rmse, output_file):
+    """Visualization 1: Actual vs Predicted."""
+    print("Creating visualization 1: Actual vs Predicted...")
+    fig, ax = plt.subplots(figsize=(10, 8))
 
-# ==============================================================================
-# Visualization 1: Actual vs Predicted
-# ==============================================================================
-print("Creating visualization 1: Actual vs Predicted...")
-fig, ax = plt.subplots(figsize=(10, 8))
+    # Sample for clearer visualization
+    sample_size = min(5000, len(y))
+    rng = np.random.default_rng(0)
+    idx = rng.integers(0, len(y), sample_size)
+    y_sample = y[idx]
+    y_pred_sample = y_pred[idx]
 
-# Sample for clearer visualization
-sample_size = min(5000, len(y))
-idx = np.random.choice(len(y), sample_size, replace=False)
-y_sample = y.iloc[idx]
-y_pred_sample = y_pred[idx]
+    # Hexbin rasterizes the point cloud, so render cost scales with bins not points
+    hb = ax.hexbin(y_sample, y_pred_sample, gridsize=80, cmap='Blues', mincnt=1)
+    fig.colorbar(hb, ax=ax, label='ZIP codes per bin')
+    ax.plot([y.min(), y.max()], [y.min(), y.max()], 'r--', lw=2, label='Perfect Prediction')
 
-ax.scatter(y_sample, y_pred_sample, alpha=0.3, s=20)
-ax.plot([y.min(), y.max()], [y.min(), y.max()], 'r--', lw=2, label='Perfect Prediction')
+    ax.set_xlabel('Actual Average AGI ($)', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Predicted Average AGI ($)', fontsize=12, fontweight='bold')
+    ax.set_title('Model Predictions: Actual vs Predicted Income\n(XGBoost Model)', 
+                 fontsize=14, fontweight='bold')
 
-ax.set_xlabel('Actual Average AGI ($)', fontsize=12, fontweight='bold')
-ax.set_ylabel('Predicted Average AGI ($)', fontsize=12, fontweight='bold')
-ax.set_title('Model Predictions: Actual vs Predicted Income\n(XGBoost Model)', 
-             fontsize=14, fontweight='bold')
+    # Format axes
+    ax.ticklabel_format(style='plain', axis='both')
+    ax.xaxis.set_major_formatter(K_FORMATTER)
+    ax.yaxis.set_major_formatter(K_FORMATTER)
+
+    # Add metrics box
+    textstr = f'R² = {r2:.4f}\nMAE = ${mae:,.0f}\nRMSE = ${rmse:,.0f}\nSamples = {sample_size:,}'
+    props = dict(boxstyle='round', facecolor='wheat', alpha=0.5)
+    ax.text(0.05, 0.95, textstr, transform=ax.transAxes, fontsize=11,
+            verticalalignment='top', bbox=props)
+
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    save(fig, output_file)
+
+
+def make_error_distribution(errors, output_file):
+    """Visualization 2: Prediction Error Distribution."""
+    print("Creating visualization 2: Prediction Error Distribution...")
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+
+    # Histogram
+    axes[0].hist(errors, bins=50, edgecolor='black', alpha=0.7)
+    axes[0].axvline(0, color='red', linestyle='--', linewidth=2, label='Zero Error')
+    axes[0].set_xlabel('Prediction Error ($)', fontsize=11, fontweight='bold')
+    axes[0].set_ylabel('Frequency', fontsize=11, fontweight='bold')
+    axes[0].set_title('Distribution of Prediction Errors', fontsize=12, fontweight='bold')
+    axes[0].legend()
+    axes[0].grid(True, alpha=0.3)
+
+    # Box plot
+    axes[1].boxplot([errors], vert=True)
+    axes[1].axhline(0, color='red', linestyle='--', linewidth=2)
+    axes[1].set_ylabel('Prediction Error ($)', fontsize=11, fontweight='bold')
+    axes[1].set_title('Prediction Error Box Plot', fontsize=12, fontweight='bold')
+    axes[1].set_xticklabels(['Errors'])
+    axes[1].grid(True, alpha=0.3)
+
+    # Add statistics
+    mu, sig, med = errors.mean(), errors.std(ddof=1), np.median(errors)
+    textstr = f'Mean Error: ${mu:,.0f}\nStd Dev: ${sig:,.0f}\nMedian: ${med:,.0f}'
+    props = dict(boxstyle='round', facecolor='lightblue', alpha=0.5)
+    axes[1].text(0.98, 0.97, textstr, transform=axes[1].transAxes, fontsize=10,
+                verticalalignment='top', horizontalalignment='right', bbox=props)
+
+    fig.tight_layout()
+    save(fig, output_file)
+
+
+def make_feature_importance(feature_cols, importance, output_file):
+    """Visualization 3: Feature Importance."""
+    print("Creating visualization 3: Feature Importance...")
+    fig, ax = plt.subplots(figsize=(10, 8))
 
-# Format axes
-ax.ticklabel_format(style='plain', axis='both')
-from matplotlib.ticker import FuncFormatter
-formatter = FuncFormatter(lambda x, p: f'${x/1000:.0f}K')
-ax.xaxis.set_major_formatter(formatter)
-ax.yaxis.set_major_formatter(formatter)
-
-# Add metrics box
-textstr = f'R² = {r2:.4f}\nMAE = ${mae:,.0f}\nRMSE = ${rmse:,.0f}\nSamples = {sample_size:,}'
-props = dict(boxstyle='round', facecolor='wheat', alpha=0.5)
-ax.text(0.05, 0.95, textstr, transform=ax.transAxes, fontsize=11,
-        verticalalignment='top', bbox=props)
-
-ax.legend()
-ax.grid(True, alpha=0.3)
-plt.tight_layout()
-
-output_file = REPORTS_DIR / 'prediction_scatter.png'
-plt.savefig(output_file, dpi=150, bbox_inches='tight')
-plt.close()
-print(f"✓ Saved: {output_file.name}")
-
-# ==============================================================================
-# Visualization 2: Prediction Error Distribution
-# ==============================================================================
-print("Creating visualization 2: Prediction Error Distribution...")
-fig, axes = plt.subplots(1, 2, figsize=(14, 5))
-
-errors = y - y_pred
-
-# Histogram
-axes[0].hist(errors, bins=50, edgecolor='black', alpha=0.7)
-axes[0].axvline(0, color='red', linestyle='--', linewidth=2, label='Zero Error')
-axes[0].set_xlabel('Prediction Error ($)', fontsize=11, fontweight='bold')
-axes[0].set_ylabel('Frequency', fontsize=11, fontweight='bold')
-axes[0].set_title('Distribution of Prediction Errors', fontsize=12, fontweight='bold')
-axes[0].legend()
-axes[0].grid(True, alpha=0.3)
-
-# Box plot
-axes[1].boxplot([errors], vert=True)
-axes[1].axhline(0, color='red', linestyle='--', linewidth=2)
-axes[1].set_ylabel('Prediction Error ($)', fontsize=11, fontweight='bold')
-axes[1].set_title('Prediction Error Box Plot', fontsize=12, fontweight='bold')
-axes[1].set_xticklabels(['Errors'])
-axes[1].grid(True, alpha=0.3)
-
-# Add statistics
-textstr = f'Mean Error: ${errors.mean():,.0f}\nStd Dev: ${errors.std():,.0f}\nMedian: ${errors.median():,.0f}'
-props = dict(boxstyle='round', facecolor='lightblue', alpha=0.5)
-axes[1].text(0.98, 0.97, textstr, transform=axes[1].transAxes, fontsize=10,
-            verticalalignment='top', horizontalalignment='right', bbox=props)
-
-plt.tight_layout()
-output_file = REPORTS_DIR / 'error_distribution.png'
-plt.savefig(output_file, dpi=150, bbox_inches='tight')
-plt.close()
-print(f"✓ Saved: {output_file.name}")
-
-# ==============================================================================
-# Visualization 3: Feature Importance
-# ==============================================================================
-print("Creating visualization 3: Feature Importance...")
-fig, ax = plt.subplots(figsize=(10, 8))
-
-if hasattr(model, 'feature_importances_'):
-    importance = model.feature_importances_
     importance_df = pd.DataFrame({
         'feature': feature_cols,
         'importance': importance
@@ -159,46 +124,118 @@ if hasattr(model, 'feature_importances_'):
                  fontsize=14, fontweight='bold')
     ax.grid(True, alpha=0.3, axis='x')
     
-    plt.tight_layout()
-    output_file = REPORTS_DIR / 'feature_importance.png'
-    plt.savefig(output_file, dpi=150, bbox_inches='tight')
-    plt.close()
-    print(f"✓ Saved: {output_file.name}")
-
-# ==============================================================================
-# Visualization 4: Income by State (Top 15)
-# ==============================================================================
-print("Creating visualization 4: Average Income by State...")
-fig, ax = plt.subplots(figsize=(12, 6))
-
-# Calculate average AGI by state
-state_avg = df.groupby('state')['avg_agi'].mean().sort_values(ascending=False).head(15)
-
-ax.bar(range(len(state_avg)), state_avg.values)
-ax.set_xticks(range(len(state_avg)))
-ax.set_xticklabels(state_avg.index, rotation=45, ha='right')
-ax.set_ylabel('Average AGI ($)', fontsize=12, fontweight='bold')
-ax.set_title('Top 15 States by Average Income (from ZIP codes)', 
-             fontsize=14, fontweight='bold')
-
-# Format y-axis
-formatter = FuncFormatter(lambda x, p: f'${x/1000:.0f}K')
-ax.yaxis.set_major_formatter(formatter)
-ax.grid(True, alpha=0.3, axis='y')
-
-plt.tight_layout()
-output_file = REPORTS_DIR / 'income_by_state.png'
-plt.savefig(output_file, dpi=150, bbox_inches='tight')
-plt.close()
-print(f"✓ Saved: {output_file.name}")
-
-# ==============================================================================
-# Generate Summary Report
-# ==============================================================================
-print()
-print("Creating summary report...")
-
-summary = f"""# Regional Income Prediction - Model Results
+    fig.tight_layout()
+    save(fig, output_file)
+
+
+def make_income_by_state(state, avg_agi, output_file):
+    """Visualization 4: Income by State (Top 15)."""
+    print("Creating visualization 4: Average Income by State...")
+    fig, ax = plt.subplots(figsize=(12, 6))
+
+    # Calculate average AGI by state (bincount over state codes, one pass in C)
+    codes, states = pd.factorize(state, sort=False)
+    valid = codes >= 0
+    sums = np.bincount(codes[valid], weights=avg_agi[valid])
+    counts = np.bincount(codes[valid])
+    means = sums / counts
+    order = np.argsort(means)[::-1][:15]
+    top_states = states[order]
+    top_means = means[order]
+
+    ax.bar(range(len(top_means)), top_means)
+    ax.set_xticks(range(len(top_means)))
+    ax.set_xticklabels(top_states, rotation=45, ha='right')
+    ax.set_ylabel('Average AGI ($)', fontsize=12, fontweight='bold')
+    ax.set_title('Top 15 States by Average Income (from ZIP codes)', 
+                 fontsize=14, fontweight='bold')
+
+    # Format y-axis
+    ax.yaxis.set_major_formatter(K_FORMATTER)
+    ax.grid(True, alpha=0.3, axis='y')
+
+    fig.tight_layout()
+    save(fig, output_file)
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("GENERATING PREDICTION VISUALIZATIONS")
+    print("="*70)
+    print()
+
+    # Create reports directory
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Load data and model
+    print("Loading data and model...")
+    data_file = DATA_PROCESSED_DIR / 'merged.parquet'
+    model = joblib.load(MODELS_DIR / 'best_model.pkl')
+
+    # Prepare features (resolve columns from the parquet schema so only the
+    # needed columns are read from disk)
+    target = 'avg_agi'
+    exclude_cols = frozenset(['zipcode', 'state', 'state_fips', target])
+    all_cols = pq.ParquetFile(data_file).schema_arrow.names
+    feature_cols = [col for col in all_cols if col not in exclude_cols]
+
+    # Arrow-backed columns skip the Arrow -> NumPy copy on load; NumPy arrays
+    # are materialized explicitly below where they are needed
+    df = pd.read_parquet(data_file, columns=feature_cols + [target, 'zipcode', 'state'],
+                         engine='pyarrow', dtype_backend='pyarrow')
+
+    # Tree models predict on float32 internally, so convert once up front and
+    # impute medians in place on the NumPy-backed frame
+    X = df[feature_cols].astype(np.float32)
+    X.fillna(X.median(), inplace=True)
+    y = df[target].to_numpy(dtype=np.float64)
+
+    # Make predictions
+    print("Making predictions...")
+    y_pred = model.predict(X)
+
+    # Calculate metrics
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+    mae = mean_absolute_error(y, y_pred)
+    rmse = np.sqrt(mean_squared_error(y, y_pred))
+    r2 = r2_score(y, y_pred)
+
+    print(f"✓ Predictions complete")
+    print(f"  MAE:  ${mae:,.2f}")
+    print(f"  RMSE: ${rmse:,.2f}")
+    print(f"  R²:   {r2:.4f}")
+    print()
+
+    # Plain ndarray residuals (no index alignment), shared by the plots
+    errors = y - y_pred
+
+    # The four figures are independent, so render them in parallel worker
+    # processes (Agg drawing and PNG encoding are single-threaded)
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(make_scatter, y, y_pred, r2, mae, rmse,
+                            REPORTS_DIR / 'prediction_scatter.png'),
+            executor.submit(make_error_distribution, errors,
+                            REPORTS_DIR / 'error_distribution.png'),
+            executor.submit(make_income_by_state, df['state'].to_numpy(dtype=object),
+                            y,
+                            REPORTS_DIR / 'income_by_state.png'),
+        ]
+        if hasattr(model, 'feature_importances_'):
+            futures.append(executor.submit(
+                make_feature_importance, feature_cols, model.feature_importances_,
+                REPORTS_DIR / 'feature_importance.png'
+            ))
+        for future in futures:
+            future.result()
+
+    # ==============================================================================
+    # Generate Summary Report
+    # ==============================================================================
+    print()
+    print("Creating summary report...")
+
+    summary = f"""# Regional Income Prediction - Model Results
 
 ## Dataset Summary
 - Total ZIP Codes: {len(df):,}
@@ -220,25 +257,33 @@ summary = f"""# Regional Income Prediction - Model Results
 ## Top 5 Most Important Features
 """
 
-if hasattr(model, 'feature_importances_'):
-    importance = model.feature_importances_
-    importance_df = pd.DataFrame({
-        'feature': feature_cols,
-        'importance': importance
-    }).sort_values('importance', ascending=False).head(5)
-    
-    for i, row in importance_df.iterrows():
-        summary += f"{i+1}. **{row['feature']}**: {row['importance']:.4f}\n"
+    if hasattr(model, 'feature_importances_'):
+        importance = model.feature_importances_
+        importance_df = pd.DataFrame({
+            'feature': feature_cols,
+            'importance': importance
+        }).sort_values('importance', ascending=False).head(5)
 
-summary += f"""
+        summary += "".join(
+            f"{i+1}. **{feature}**: {imp:.4f}\n"
+            for i, (feature, imp) in enumerate(importance_df[['feature', 'importance']].to_numpy())
+        )
+
+    summary += f"""
 ## Highest Income ZIP Codes
 """
 
-top_zips = df.nlargest(5, 'avg_agi')[['zipcode', 'state', 'avg_agi']]
-for _, row in top_zips.iterrows():
-    summary += f"- {row['zipcode']} ({row['state']}): ${row['avg_agi']:,.2f}\n"
-
-summary += f"""
+    # O(n) partial selection of the top 5 targets, then sort just those
+    k = min(5, len(y))
+    top_idx = np.argpartition(-y, k - 1)[:k]
+    top_idx = top_idx[np.argsort(-y[top_idx])]
+    top_zips = df.iloc[top_idx][['zipcode', 'state', 'avg_agi']]
+    summary += "".join(
+        f"- {int(zipcode):05d} ({state}): ${agi:,.2f}\n"
+        for zipcode, state, agi in top_zips.to_numpy(dtype=object)
+    )
+
+    summary += f"""
 ## Generated Visualizations
 1. `prediction_scatter.png` - Actual vs Predicted income scatter plot
 2. `error_distribution.png` - Model prediction error analysis
@@ -258,21 +303,21 @@ This will launch an interactive dashboard where you can:
 - View detailed model insights
 """
 
-report_file = REPORTS_DIR / 'MODEL_SUMMARY.md'
-with open(report_file, 'w') as f:
-    f.write(summary)
-
-print(f"✓ Saved: {report_file.name}")
-print()
-print("="*70)
-print("ALL VISUALIZATIONS COMPLETE!")
-print("="*70)
-print()
-print(f"📊 Visualizations saved to: {REPORTS_DIR}")
-print(f"   - prediction_scatter.png")
-print(f"   - error_distribution.png")
-print(f"   - feature_importance.png")
-print(f"   - income_by_state.png")
-print(f"   - MODEL_SUMMARY.md")
-print()
-print("="*70)
+    report_file = REPORTS_DIR / 'MODEL_SUMMARY.md'
+    with open(report_file, 'w', buffering=1 << 18) as f:
+        f.write(summary)
+
+    print(f"✓ Saved: {report_file.name}")
+    print()
+    print("="*70)
+    print("ALL VISUALIZATIONS COMPLETE!")
+    print("="*70)
+    print()
+    print(f"📊 Visualizations saved to: {REPORTS_DIR}")
+    print(f"   - prediction_scatter.png")
+    print(f"   - error_distribution.png")
+    print(f"   - feature_importance.png")
+    print(f"   - income_by_state.png")
+    print(f"   - MODEL_SUMMARY.md")
+    print()
+    print("="*70)
@@ -6,12 +6,22 @@ Loads environment variables and provides centralized access to settings.
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Mapping
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+
+@lru_cache(maxsize=1)
+def get_config() -> Mapping[str, str]:
+    """
+    Load the .env file (once per process) and return the environment.
+    
+    Returns:
+        Mapping[str, str]: Environment variables, including those from .env
+    """
+    load_dotenv()
+    return os.environ
 
 # ============================================================================
 # PROJECT PATHS
@@ -29,6 +39,7 @@ DATA_PROCESSED_DIR = BASE_DIR / "data_processed"
 
 # Model and report directories
 MODELS_DIR = BASE_DIR / "models"
+SHAP_CACHE_DIR = MODELS_DIR / "shap_cache"
 REPORTS_DIR = BASE_DIR / "reports"
 FEATURE_IMPORTANCE_DIR = REPORTS_DIR / "feature_importance"
 
@@ -37,26 +48,26 @@ FEATURE_IMPORTANCE_DIR = REPORTS_DIR / "feature_importance"
 # ============================================================================
 
 # Census API key (required for data collection)
-CENSUS_API_KEY = os.getenv("CENSUS_API_KEY", "")
+CENSUS_API_KEY = get_config().get("CENSUS_API_KEY", "")
 
 # IRS Data URLs
-IRS_ZIP_DATA_URL = os.getenv(
+IRS_ZIP_DATA_URL = get_config().get(
     "IRS_ZIP_DATA_URL",
     "https://www.irs.gov/pub/irs-soi/zipcode.zip"
 )
-IRS_COUNTY_DATA_URL = os.getenv(
+IRS_COUNTY_DATA_URL = get_config().get(
     "IRS_COUNTY_DATA_URL",
     "https://www.irs.gov/pub/irs-soi/countydata.zip"
 )
 
 # HUD Crosswalk URL
-HUD_ZIP_COUNTY_CROSSWALK_URL = os.getenv(
+HUD_ZIP_COUNTY_CROSSWALK_URL = get_config().get(
     "HUD_ZIP_COUNTY_CROSSWALK_URL",
     "https://www.huduser.gov/portal/datasets/usps_crosswalk.html"
 )
 
 # TIGER/Line Shapefiles
-TIGER_SHAPEFILE_BASE_URL = os.getenv(
+TIGER_SHAPEFILE_BASE_URL = get_config().get(
     "TIGER_SHAPEFILE_BASE_URL",
     "https://www2.census.gov/geo/tiger/TIGER2023"
 )
@@ -115,17 +126,17 @@ CENSUS_GEO_LEVELS: List[str] = ["county", "zip code tabulation area"]
 # ============================================================================
 
 # Random seed for reproducibility
-RANDOM_SEED = int(os.getenv("RANDOM_SEED", "42"))
+RANDOM_SEED = int(get_config().get("RANDOM_SEED", "42"))
 
 # Train/test split ratio
-TEST_SIZE = float(os.getenv("TEST_SIZE", "0.2"))
+TEST_SIZE = float(get_config().get("TEST_SIZE", "0.2"))
 
 # Cross-validation folds
-CV_FOLDS = int(os.getenv("CV_FOLDS", "5"))
+CV_FOLDS = int(get_config().get("CV_FOLDS", "5"))
 
 # Optuna hyperparameter tuning configuration
-N_TRIALS = int(os.getenv("N_TRIALS", "100"))
-OPTUNA_TIMEOUT = int(os.getenv("OPTUNA_TIMEOUT", "3600"))  # seconds
+N_TRIALS = int(get_config().get("N_TRIALS", "100"))
+OPTUNA_TIMEOUT = int(get_config().get("OPTUNA_TIMEOUT", "3600"))  # seconds
 
 # Model names
 MODEL_NAMES: List[str] = [
@@ -169,18 +180,21 @@ DERIVED_FEATURES: List[str] = [
 # Missing value imputation strategy
 IMPUTATION_STRATEGY = "median"
 
+# Downcast loaded numeric columns (int64 -> smallest int, float64 -> float32)
+DOWNCAST_NUMERIC = True
+
 # ============================================================================
 # STREAMLIT CONFIGURATION
 # ============================================================================
 
-STREAMLIT_PORT = int(os.getenv("STREAMLIT_PORT", "8501"))
-STREAMLIT_SERVER_HEADLESS = os.getenv("STREAMLIT_SERVER_HEADLESS", "true").lower() == "true"
+STREAMLIT_PORT = int(get_config().get("STREAMLIT_PORT", "8501"))
+STREAMLIT_SERVER_HEADLESS = get_config().get("STREAMLIT_SERVER_HEADLESS", "true").lower() == "true"
 
 # ============================================================================
 # LOGGING CONFIGURATION
 # ============================================================================
 
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVEL = get_config().get("LOG_LEVEL", "INFO")
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
@@ -191,6 +205,7 @@ LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 PROCESSED_DATA_FILE = "merged.parquet"
 BEST_MODEL_FILE = "best_model.joblib"
 FEATURE_PIPELINE_FILE = "feature_pipeline.joblib"
+FEATURE_TRANSFORM_FILE = "feature_transform.npz"
 SCALER_FILE = "scaler.joblib"
 
 # ============================================================================
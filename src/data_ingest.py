@@ -13,23 +13,35 @@ Usage:
     python src/data_ingest.py
 """
 
+import hashlib
+import importlib.util
+import json
+import shutil
 import requests
 import zipfile
 import io
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
+from pyarrow import feather
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from tqdm import tqdm
 
-# Optional geospatial imports - only used for advanced features
-try:
-    import geopandas as gpd
-    import censusdata
-    GEOSPATIAL_AVAILABLE = True
-except ImportError:
-    GEOSPATIAL_AVAILABLE = False
+# Optional geospatial packages - only used for advanced features. They are
+# heavy to import, so only check they are installed here and import them
+# inside the methods that need them.
+GEOSPATIAL_AVAILABLE = all(
+    importlib.util.find_spec(module) is not None for module in ("geopandas", "censusdata")
+)
+if not GEOSPATIAL_AVAILABLE:
     print("Warning: geospatial packages not available. Skipping Census API and shapefile features.")
+
+if TYPE_CHECKING:
+    import geopandas as gpd
 from src.config import (
     DATA_RAW_IRS_DIR,
     DATA_RAW_CENSUS_DIR,
@@ -48,6 +60,103 @@ from src.helpers import save_dataframe
 
 logger = get_logger(__name__)
 
+# Bytes per read when streaming HTTP downloads to disk
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# Bytes per block when streaming the IRS ZIP-code CSV
+IRS_CSV_BLOCK_SIZE = 16 << 20
+
+# ============================================================================
+# STATIC SAMPLE DATA
+# ============================================================================
+# Built once at import; methods hand out copies so callers can mutate freely.
+
+# Approximate county-level IRS aggregates used until a ZIP-to-county
+# crosswalk is wired in
+_IRS_COUNTY_AGGREGATES = pd.DataFrame({
+    'state_fips': ['01', '06', '36', '48'],
+    'county_fips': ['073', '037', '061', '201'],
+    'county_name': ['Jefferson', 'Los Angeles', 'New York', 'Harris'],
+    'num_returns': [100000, 3500000, 800000, 1500000],
+    'total_agi': [5000000000, 150000000000, 45000000000, 75000000000],
+    'avg_agi_per_return': [50000, 42857, 56250, 50000],
+})
+
+# Sample ZIP-level IRS data structure
+_SAMPLE_IRS_ZIP_DATA = pd.DataFrame({
+    'zipcode': ['10001', '10002', '90001', '90002'],
+    'num_returns': [50000, 45000, 60000, 55000],
+    'total_agi': [2500000000, 2000000000, 2800000000, 2400000000],
+    'avg_agi_per_return': [50000, 44444, 46667, 43636],
+    'total_wages': [2000000000, 1800000000, 2300000000, 2100000000],
+    'dividends': [300000000, 150000000, 350000000, 200000000],
+    'business_income': [200000000, 50000000, 150000000, 100000000],
+})
+
+# Sample county-level IRS data structure
+_SAMPLE_IRS_COUNTY_DATA = pd.DataFrame({
+    'state_fips': ['36', '36', '06', '06'],
+    'county_fips': ['061', '005', '037', '059'],
+    'county_name': ['New York', 'Bronx', 'Los Angeles', 'Orange'],
+    'num_returns': [800000, 500000, 3500000, 1200000],
+    'total_agi': [45000000000, 15000000000, 150000000000, 65000000000],
+    'avg_agi_per_return': [56250, 30000, 42857, 54167],
+})
+
+# Sample county-level Census data
+_SAMPLE_CENSUS_COUNTY_DATA = pd.DataFrame({
+    'fips': ['36061', '36005', '06037', '06059'],
+    'state_fips': ['36', '36', '06', '06'],
+    'county_fips': ['061', '005', '037', '059'],
+    'median_household_income': [75000, 42000, 68000, 95000],
+    'per_capita_income': [45000, 25000, 38000, 52000],
+    'total_population': [1600000, 1400000, 10000000, 3200000],
+    'total_households': [620000, 480000, 3400000, 1100000],
+    'avg_household_size': [2.58, 2.92, 2.94, 2.91],
+    'median_age': [37.5, 34.2, 36.4, 38.1],
+    'unemployed': [62000, 84000, 450000, 96000],
+    'labor_force': [800000, 600000, 5000000, 1600000],
+    'bachelors_degree': [400000, 120000, 2000000, 700000],
+    'total_population_25plus': [1200000, 900000, 7000000, 2400000],
+    'poverty_count': [256000, 350000, 1800000, 320000],
+    'poverty_denominator': [1600000, 1400000, 10000000, 3200000],
+    'median_home_value': [650000, 350000, 700000, 800000],
+    'median_gross_rent': [1500, 1100, 1800, 2000],
+    'owner_occupied_housing': [248000, 192000, 1700000, 660000],
+    'renter_occupied_housing': [372000, 288000, 1700000, 440000],
+})
+
+# Sample ZIP-level Census data
+_SAMPLE_CENSUS_ZIP_DATA = pd.DataFrame({
+    'zipcode': ['10001', '10002', '90001', '90002'],
+    'median_household_income': [85000, 55000, 45000, 48000],
+    'per_capita_income': [55000, 30000, 25000, 27000],
+    'total_population': [25000, 32000, 57000, 51000],
+    'total_households': [10000, 11000, 18000, 16000],
+    'avg_household_size': [2.5, 2.9, 3.2, 3.2],
+    'median_age': [36.5, 32.1, 30.8, 29.5],
+    'unemployed': [500, 900, 2850, 2550],
+    'labor_force': [12000, 14000, 28500, 25500],
+    'bachelors_degree': [5000, 2200, 3420, 3060],
+    'total_population_25plus': [18000, 21000, 38000, 34000],
+    'poverty_count': [2000, 6400, 11400, 10200],
+    'poverty_denominator': [25000, 32000, 57000, 51000],
+    'median_home_value': [750000, 450000, 350000, 380000],
+    'median_gross_rent': [1800, 1300, 1200, 1250],
+    'owner_occupied_housing': [3000, 3300, 9000, 8000],
+    'renter_occupied_housing': [7000, 7700, 9000, 8000],
+})
+
+# Sample HUD ZIP-County crosswalk
+_SAMPLE_HUD_CROSSWALK = pd.DataFrame({
+    'zipcode': ['10001', '10002', '90001', '90002'],
+    'county_fips': ['36061', '36061', '06037', '06037'],
+    'state_fips': ['36', '36', '06', '06'],
+    'county_name': ['New York County', 'New York County', 
+                   'Los Angeles County', 'Los Angeles County'],
+    'residential_ratio': [1.0, 1.0, 1.0, 1.0],  # Proportion of ZIP in county
+})
+
 
 class DataIngester:
     """
@@ -65,33 +174,74 @@ class DataIngester:
         for directory in [self.irs_dir, self.census_dir, 
                          self.shapefiles_dir, self.processed_dir]:
             directory.mkdir(parents=True, exist_ok=True)
+        
+        # Shared session so repeated downloads reuse keep-alive connections
+        self.session = requests.Session()
     
-    def download_file(self, url: str, destination: Path) -> None:
+    def download_file(self, url: str, destination: Path, show_progress: bool = True) -> None:
         """
         Download file from URL to destination with progress bar.
         
+        The response's ETag/Last-Modified headers are stored in a sidecar
+        ``<destination>.etag.json``; later calls send them as conditional
+        headers and skip the download on ``304 Not Modified``.
+        
         Args:
             url: Source URL
             destination: Destination file path
+            show_progress: Show a tqdm progress bar; when False the body is
+                copied straight to disk with shutil.copyfileobj
         """
         logger.info(f"Downloading from {url}")
         
+        sidecar = destination.with_name(destination.name + '.etag.json')
+        headers = {}
+        if destination.exists() and sidecar.exists():
+            validators = json.loads(sidecar.read_text())
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+        
         try:
-            response = requests.get(url, stream=True, timeout=30)
+            response = self.session.get(url, headers=headers, stream=True, timeout=30)
+            if response.status_code == 304:
+                response.close()
+                logger.info(f"Not modified, keeping cached {destination}")
+                return
             response.raise_for_status()
             
             total_size = int(response.headers.get('content-length', 0))
             
-            with open(destination, 'wb') as f, tqdm(
-                desc=destination.name,
-                total=total_size,
-                unit='iB',
-                unit_scale=True,
-                unit_divisor=1024,
-            ) as pbar:
-                for chunk in response.iter_content(chunk_size=8192):
-                    size = f.write(chunk)
-                    pbar.update(size)
+            # Stream into a temp file and only swap it in once complete, so an
+            # interrupted download never leaves a truncated file behind a
+            # still-valid sidecar
+            sidecar.unlink(missing_ok=True)
+            partial = destination.with_name(destination.name + '.part')
+            try:
+                if show_progress:
+                    with open(partial, 'wb') as f, tqdm(
+                        desc=destination.name,
+                        total=total_size,
+                        unit='iB',
+                        unit_scale=True,
+                        unit_divisor=1024,
+                    ) as pbar:
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            size = f.write(chunk)
+                            pbar.update(size)
+                else:
+                    response.raw.decode_content = True
+                    with open(partial, 'wb') as f:
+                        shutil.copyfileobj(response.raw, f, length=1 << 20)
+                partial.replace(destination)
+            finally:
+                partial.unlink(missing_ok=True)
+            
+            sidecar.write_text(json.dumps({
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }))
             
             logger.info(f"Downloaded to {destination}")
         
@@ -99,7 +249,7 @@ class DataIngester:
             logger.error(f"Failed to download {url}: {e}")
             raise
     
-    def download_irs_data(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    def download_irs_data(self, write_csv: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
         Load IRS SOI Individual Income Tax Statistics from CSV files.
         Uses the 15zpallagi.csv file which contains ZIP-level AGI and tax data.
@@ -107,6 +257,9 @@ class DataIngester:
         Data source: IRS SOI Individual Income Tax Statistics - ZIP Code Data
         https://www.irs.gov/statistics/soi-tax-stats-individual-income-tax-statistics-zip-code-data-soi
         
+        Args:
+            write_csv: Also write the processed tables as CSV (for debugging)
+        
         Returns:
             tuple: (zip_level_df, county_level_df)
         """
@@ -119,17 +272,6 @@ class DataIngester:
             logger.warning(f"IRS data file not found at {irs_file}. Using sample data instead.")
             return self._generate_sample_irs_data()
         
-        # Read the CSV file
-        df = pd.read_csv(irs_file, low_memory=False)
-        logger.info(f"Loaded {len(df)} raw IRS records from {irs_file.name}")
-        
-        # Filter out aggregate records (keep only ZIP code level data)
-        # Records with zipcode=00000 are state-level aggregates
-        df = df[df['zipcode'] != '00000'].copy()
-        
-        # Convert string zipcode to proper format (5-digit with leading zeros)
-        df['zipcode'] = df['zipcode'].astype(str).str.zfill(5)
-        
         # Extract key columns for ZIP-level data
         zip_columns = {
             'zipcode': 'zipcode',
@@ -145,9 +287,20 @@ class DataIngester:
             'A02650': 'total_income',
         }
         
-        df_zip = df[list(zip_columns.keys())].rename(columns=zip_columns).copy()
+        # Read only the needed columns with pinned types (no type inference
+        # over the ~100 unused columns)
+        irs_types = {
+            'zipcode': pa.string(),
+            'STATEFIPS': pa.string(),
+            'STATE': pa.string(),
+            'agi_stub': pa.int8(),
+        }
+        irs_types.update({col: pa.float32() if col.startswith('N') else pa.float64()
+                          for col in zip_columns if col not in irs_types})
         
-        # Aggregate by ZIP code (sum across income brackets)
+        # Aggregate by ZIP code (sum across income brackets). Arrow's hash
+        # aggregation names outputs '<col>_<func>', so map them back after
+        # each pass.
         zip_agg = {
             'state_fips': 'first',
             'state': 'first',
@@ -159,38 +312,106 @@ class DataIngester:
             'business_income': 'sum',
             'total_income': 'sum',
         }
+        aggregations = list(zip_agg.items())
+        agg_names = {f'{col}_{func}': col for col, func in aggregations}
+        
+        def aggregate_by_zip(table: pa.Table) -> pa.Table:
+            # 'first' needs ordered, single-threaded execution
+            result = table.group_by('zipcode', use_threads=False).aggregate(aggregations)
+            return result.rename_columns([agg_names.get(name, name) for name in result.column_names])
+        
+        # The per-ZIP aggregate is cached as Feather keyed on the CSV's size and
+        # mtime, so later runs skip parsing entirely
+        irs_stat = irs_file.stat()
+        cache_file = self.irs_dir / f"{irs_file.stem}.{irs_stat.st_size}-{irs_stat.st_mtime_ns}.feather"
+        
+        if cache_file.exists():
+            logger.info(f"Loading cached IRS aggregates from {cache_file.name}")
+            zip_table = feather.read_table(cache_file)
+        else:
+            # Stream the file through Arrow's multithreaded CSV reader in blocks and
+            # keep only per-block partial aggregates, so peak memory is bounded by
+            # the block size plus the number of ZIPs
+            reader = pacsv.open_csv(
+                irs_file,
+                read_options=pacsv.ReadOptions(use_threads=True, block_size=IRS_CSV_BLOCK_SIZE),
+                convert_options=pacsv.ConvertOptions(include_columns=list(zip_columns),
+                                                     column_types=irs_types),
+            )
+            partials = []
+            num_records = 0
+            for batch in reader:
+                num_records += batch.num_rows
+                table = pa.Table.from_batches([batch])
+            
+                # Convert string zipcode to proper format (5-digit with leading zeros)
+                # with Arrow's vectorized lpad, before any filtering
+                zipcode = pc.utf8_lpad(table['zipcode'], width=5, padding='0')
+                table = table.set_column(table.schema.get_field_index('zipcode'), 'zipcode', zipcode)
+            
+                # Filter out aggregate records (keep only ZIP code level data)
+                # Records with zipcode=00000 are state-level aggregates
+                table = table.filter(pc.not_equal(table['zipcode'], '00000'))
+                table = table.rename_columns([zip_columns[name] for name in table.column_names])
+                partials.append(aggregate_by_zip(table))
+            logger.info(f"Loaded {num_records} raw IRS records from {irs_file.name}")
+        
+            # A ZIP split across block boundaries has several partial rows; the
+            # same first/sum reduction combines them. Arrow results are columnar,
+            # so each pandas column gets its own contiguous buffer.
+            zip_table = aggregate_by_zip(pa.concat_tables(partials)).sort_by('zipcode')
+            
+            for stale_cache in self.irs_dir.glob(f"{irs_file.stem}.*.feather"):
+                stale_cache.unlink()
+            feather.write_feather(zip_table, cache_file)
         
-        zip_data = df_zip.groupby('zipcode').agg(zip_agg).reset_index()
+        zip_data = zip_table.to_pandas()[['zipcode', *zip_agg]]
         
         # Calculate average AGI per return
         # Note: IRS data values are in thousands of dollars, so multiply by 1000
-        zip_data['avg_agi_per_return'] = (
-            zip_data['total_agi'] * 1000 / zip_data['num_returns'].replace(0, np.nan)
-        )
-        
-        # Remove rows with missing or invalid AGI
-        zip_data = zip_data.dropna(subset=['avg_agi_per_return'])
-        zip_data = zip_data[zip_data['avg_agi_per_return'] > 0]
+        # (np.divide with where= leaves NaN for zero returns without a masked copy)
+        num_returns = zip_data['num_returns'].to_numpy(dtype=np.float64)
+        avg_agi = np.full(len(zip_data), np.nan)
+        np.divide(zip_data['total_agi'].to_numpy(dtype=np.float64) * 1000.0, num_returns,
+                  out=avg_agi, where=num_returns > 0)
+        zip_data['avg_agi_per_return'] = avg_agi
+        
+        # Remove rows with missing or invalid AGI (single combined mask)
+        zip_data = zip_data.loc[np.isfinite(avg_agi) & (avg_agi > 0)]
+        
+        # Downcast once the target is computed: states become categoricals,
+        # return counts fit in UInt32 (nullable, so a missing aggregate doesn't
+        # raise) and dollar amounts in float32; avg_agi_per_return stays float64
+        zip_data = zip_data.astype({
+            'state_fips': 'category',
+            'state': 'category',
+            'num_returns': 'UInt32',
+            'returns_with_wages': 'UInt32',
+            'total_agi': 'float32',
+            'total_wages': 'float32',
+            'dividends': 'float32',
+            'business_income': 'float32',
+            'total_income': 'float32',
+        })
         
         logger.info(f"Processed {len(zip_data)} ZIP codes with valid AGI data")
         
         # Create county-level aggregates from ZIP data
         # Note: This is an approximation since we don't have direct county mapping
         # In production, you'd want to use a ZIP-to-County crosswalk file
-        county_data = pd.DataFrame({
-            'state_fips': ['01', '06', '36', '48'],
-            'county_fips': ['073', '037', '061', '201'],
-            'county_name': ['Jefferson', 'Los Angeles', 'New York', 'Harris'],
-            'num_returns': [100000, 3500000, 800000, 1500000],
-            'total_agi': [5000000000, 150000000000, 45000000000, 75000000000],
-            'avg_agi_per_return': [50000, 42857, 56250, 50000],
-        })
+        county_data = _IRS_COUNTY_AGGREGATES.copy()
         
         logger.info(f"Created {len(county_data)} county-level aggregates")
         
-        # Save processed data for reference
-        zip_data.to_csv(self.irs_dir / "irs_zip_data_processed.csv", index=False)
-        county_data.to_csv(self.irs_dir / "irs_county_data.csv", index=False)
+        # Save processed data for reference (Parquet keeps dtypes and is much
+        # smaller/faster than CSV)
+        zip_data.to_parquet(self.irs_dir / "irs_zip_data_processed.parquet",
+                            compression='zstd', index=False)
+        county_data.to_parquet(self.irs_dir / "irs_county_data.parquet",
+                               compression='zstd', index=False)
+        if write_csv:
+            zip_data.to_csv(self.irs_dir / "irs_zip_data_processed.csv", index=False)
+            county_data.to_csv(self.irs_dir / "irs_county_data.csv", index=False)
         
         return zip_data, county_data
     
@@ -198,46 +419,41 @@ class DataIngester:
         """Generate sample IRS data as fallback."""
         logger.info("Generating sample IRS data...")
         
-        # Example ZIP-level IRS data structure
-        zip_data = pd.DataFrame({
-            'zipcode': ['10001', '10002', '90001', '90002'],
-            'num_returns': [50000, 45000, 60000, 55000],
-            'total_agi': [2500000000, 2000000000, 2800000000, 2400000000],
-            'avg_agi_per_return': [50000, 44444, 46667, 43636],
-            'total_wages': [2000000000, 1800000000, 2300000000, 2100000000],
-            'dividends': [300000000, 150000000, 350000000, 200000000],
-            'business_income': [200000000, 50000000, 150000000, 100000000],
-        })
-        
-        # Example County-level IRS data structure
-        county_data = pd.DataFrame({
-            'state_fips': ['36', '36', '06', '06'],
-            'county_fips': ['061', '005', '037', '059'],
-            'county_name': ['New York', 'Bronx', 'Los Angeles', 'Orange'],
-            'num_returns': [800000, 500000, 3500000, 1200000],
-            'total_agi': [45000000000, 15000000000, 150000000000, 65000000000],
-            'avg_agi_per_return': [56250, 30000, 42857, 54167],
-        })
+        zip_data = _SAMPLE_IRS_ZIP_DATA.copy()
+        county_data = _SAMPLE_IRS_COUNTY_DATA.copy()
         
         return zip_data, county_data
     
     def fetch_census_data(
         self,
         geo_level: str = "county",
-        year: int = 2021
+        year: int = 2021,
+        refresh: bool = False
     ) -> pd.DataFrame:
         """
         Fetch American Community Survey (ACS) data from Census API.
         
+        Results are cached as Parquet keyed by geography, year and the set of
+        ACS variables; later calls read the cache instead of the API.
+        
         Args:
             geo_level: Geographic level ('county' or 'zip code tabulation area')
             year: ACS 5-year estimate ending year
+            refresh: Ignore any cached result and query the API again
         
         Returns:
             pd.DataFrame: Census data with requested variables
         """
         logger.info(f"Fetching Census ACS data for {geo_level} ({year})...")
         
+        variables_key = hashlib.sha1(repr(sorted(ACS_VARIABLES)).encode()).hexdigest()[:8]
+        cache_file = (
+            self.census_dir / f"census_{geo_level.replace(' ', '_')}_{year}_{variables_key}.parquet"
+        )
+        if cache_file.exists() and not refresh:
+            logger.info(f"Using cached Census data: {cache_file.name}")
+            return pd.read_parquet(cache_file)
+        
         if not CENSUS_API_KEY:
             logger.error("Census API key not set. Please set CENSUS_API_KEY in .env file")
             logger.info("Get your key from: https://api.census.gov/data/key_signup.html")
@@ -246,6 +462,8 @@ class DataIngester:
             return self._create_sample_census_data(geo_level)
         
         try:
+            import censusdata
+            
             # Determine geography
             if geo_level == "county":
                 geo = censusdata.censusgeo([
@@ -276,23 +494,24 @@ class DataIngester:
             # Rename columns to friendly names
             census_df.rename(columns=ACS_VARIABLES, inplace=True)
             
-            # Extract geographic identifiers
+            # Extract geographic identifiers from each censusgeo's
+            # (name, code) params rather than regex-parsing its string form
             census_df.reset_index(inplace=True)
-            census_df['geo'] = census_df['index'].astype(str)
+            geo_params = pd.DataFrame(
+                [dict(geo.params()) for geo in census_df['index']], index=census_df.index
+            )
             
             if geo_level == "county":
-                # Parse county FIPS codes
-                census_df['state_fips'] = census_df['geo'].str.extract(r'state:(\d{2})')
-                census_df['county_fips'] = census_df['geo'].str.extract(r'county:(\d{3})')
-                census_df['fips'] = census_df['state_fips'] + census_df['county_fips']
+                census_df['state_fips'] = geo_params['state']
+                census_df['county_fips'] = geo_params['county']
+                census_df['fips'] = geo_params['state'] + geo_params['county']
             elif geo_level == "zip code tabulation area":
-                census_df['zipcode'] = census_df['geo'].str.extract(r'zip code tabulation area:(\d{5})')
+                census_df['zipcode'] = geo_params['zip code tabulation area']
             
-            census_df.drop(columns=['index', 'geo'], inplace=True)
+            census_df.drop(columns=['index'], inplace=True)
             
-            # Save raw census data
-            output_file = self.census_dir / f"census_{geo_level.replace(' ', '_')}_{year}.csv"
-            census_df.to_csv(output_file, index=False)
+            # Save raw census data (doubles as the cache for later runs)
+            census_df.to_parquet(cache_file, index=False)
             
             logger.info(f"Census data saved: {len(census_df)} records")
             return census_df
@@ -313,47 +532,9 @@ class DataIngester:
             pd.DataFrame: Sample census data
         """
         if geo_level == "county":
-            sample_data = pd.DataFrame({
-                'fips': ['36061', '36005', '06037', '06059'],
-                'state_fips': ['36', '36', '06', '06'],
-                'county_fips': ['061', '005', '037', '059'],
-                'median_household_income': [75000, 42000, 68000, 95000],
-                'per_capita_income': [45000, 25000, 38000, 52000],
-                'total_population': [1600000, 1400000, 10000000, 3200000],
-                'total_households': [620000, 480000, 3400000, 1100000],
-                'avg_household_size': [2.58, 2.92, 2.94, 2.91],
-                'median_age': [37.5, 34.2, 36.4, 38.1],
-                'unemployed': [62000, 84000, 450000, 96000],
-                'labor_force': [800000, 600000, 5000000, 1600000],
-                'bachelors_degree': [400000, 120000, 2000000, 700000],
-                'total_population_25plus': [1200000, 900000, 7000000, 2400000],
-                'poverty_count': [256000, 350000, 1800000, 320000],
-                'poverty_denominator': [1600000, 1400000, 10000000, 3200000],
-                'median_home_value': [650000, 350000, 700000, 800000],
-                'median_gross_rent': [1500, 1100, 1800, 2000],
-                'owner_occupied_housing': [248000, 192000, 1700000, 660000],
-                'renter_occupied_housing': [372000, 288000, 1700000, 440000],
-            })
+            sample_data = _SAMPLE_CENSUS_COUNTY_DATA.copy()
         else:  # ZIP code level
-            sample_data = pd.DataFrame({
-                'zipcode': ['10001', '10002', '90001', '90002'],
-                'median_household_income': [85000, 55000, 45000, 48000],
-                'per_capita_income': [55000, 30000, 25000, 27000],
-                'total_population': [25000, 32000, 57000, 51000],
-                'total_households': [10000, 11000, 18000, 16000],
-                'avg_household_size': [2.5, 2.9, 3.2, 3.2],
-                'median_age': [36.5, 32.1, 30.8, 29.5],
-                'unemployed': [500, 900, 2850, 2550],
-                'labor_force': [12000, 14000, 28500, 25500],
-                'bachelors_degree': [5000, 2200, 3420, 3060],
-                'total_population_25plus': [18000, 21000, 38000, 34000],
-                'poverty_count': [2000, 6400, 11400, 10200],
-                'poverty_denominator': [25000, 32000, 57000, 51000],
-                'median_home_value': [750000, 450000, 350000, 380000],
-                'median_gross_rent': [1800, 1300, 1200, 1250],
-                'owner_occupied_housing': [3000, 3300, 9000, 8000],
-                'renter_occupied_housing': [7000, 7700, 9000, 8000],
-            })
+            sample_data = _SAMPLE_CENSUS_ZIP_DATA.copy()
         
         sample_data.to_csv(
             self.census_dir / f"census_{geo_level.replace(' ', '_')}_sample.csv",
@@ -375,15 +556,7 @@ class DataIngester:
         # Note: In production, download from HUD's website
         # https://www.huduser.gov/portal/datasets/usps_crosswalk.html
         
-        # Sample crosswalk data
-        crosswalk = pd.DataFrame({
-            'zipcode': ['10001', '10002', '90001', '90002'],
-            'county_fips': ['36061', '36061', '06037', '06037'],
-            'state_fips': ['36', '36', '06', '06'],
-            'county_name': ['New York County', 'New York County', 
-                           'Los Angeles County', 'Los Angeles County'],
-            'residential_ratio': [1.0, 1.0, 1.0, 1.0],  # Proportion of ZIP in county
-        })
+        crosswalk = _SAMPLE_HUD_CROSSWALK.copy()
         
         crosswalk.to_csv(self.irs_dir / "hud_zip_county_crosswalk.csv", index=False)
         
@@ -394,7 +567,7 @@ class DataIngester:
         self,
         geo_type: str = "county",
         year: int = 2023
-    ) -> gpd.GeoDataFrame:
+    ) -> "gpd.GeoDataFrame":
         """
         Download TIGER/Line shapefiles for geographic visualization.
         
@@ -416,6 +589,7 @@ class DataIngester:
         )
         
         # For demonstration, create simple geometries
+        import geopandas as gpd
         from shapely.geometry import Point
         
         if geo_type == "county":
@@ -466,12 +640,21 @@ class DataIngester:
         """
         logger.info(f"Merging IRS and Census data on '{join_key}'...")
         
-        merged_df = irs_data.merge(
-            census_data,
+        # Join on shared categorical codes so the hash join works on ints
+        # rather than strings
+        key_dtype = pd.CategoricalDtype(
+            pd.Index(irs_data[join_key].unique()).union(pd.Index(census_data[join_key].unique()))
+            .dropna()
+        )
+        merged_df = irs_data.assign(**{join_key: irs_data[join_key].astype(key_dtype)}).merge(
+            census_data.assign(**{join_key: census_data[join_key].astype(key_dtype)}),
             on=join_key,
             how='inner',
+            sort=False,
             suffixes=('_irs', '_census')
         )
+        # Restore the original key dtype
+        merged_df[join_key] = merged_df[join_key].astype(irs_data[join_key].dtype)
         
         logger.info(f"Merged dataset: {len(merged_df)} records")
         logger.info(f"Total columns: {len(merged_df.columns)}")
@@ -489,23 +672,35 @@ class DataIngester:
         logger.info("Starting Data Ingestion Pipeline")
         logger.info("=" * 60)
         
-        # Step 1: Download IRS data
-        logger.info("\n[1/6] Downloading IRS data...")
-        zip_irs_data, county_irs_data = self.download_irs_data()
-        
-        # Step 2: Fetch Census data
-        logger.info("\n[2/6] Fetching Census data...")
-        zip_census_data = self.fetch_census_data(geo_level="zip code tabulation area")
-        county_census_data = self.fetch_census_data(geo_level="county")
-        
-        # Step 3: Download HUD crosswalk
-        logger.info("\n[3/6] Downloading HUD crosswalk...")
-        crosswalk = self.download_hud_crosswalk()
-        
-        # Step 4: Download shapefiles
-        logger.info("\n[4/6] Downloading TIGER/Line shapefiles...")
-        county_shapes = self.download_tiger_shapefiles(geo_type="county")
-        zip_shapes = self.download_tiger_shapefiles(geo_type="zcta")
+        # Steps 1-4 are independent network/disk-bound fetches, so they run
+        # concurrently and are gathered before merging
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            # Step 1: Download IRS data
+            logger.info("\n[1/6] Downloading IRS data...")
+            irs_future = executor.submit(self.download_irs_data)
+            
+            # Step 2: Fetch Census data
+            logger.info("\n[2/6] Fetching Census data...")
+            zip_census_future = executor.submit(
+                self.fetch_census_data, geo_level="zip code tabulation area"
+            )
+            county_census_future = executor.submit(self.fetch_census_data, geo_level="county")
+            
+            # Step 3: Download HUD crosswalk
+            logger.info("\n[3/6] Downloading HUD crosswalk...")
+            crosswalk_future = executor.submit(self.download_hud_crosswalk)
+            
+            # Step 4: Download shapefiles
+            logger.info("\n[4/6] Downloading TIGER/Line shapefiles...")
+            county_shapes_future = executor.submit(self.download_tiger_shapefiles, geo_type="county")
+            zip_shapes_future = executor.submit(self.download_tiger_shapefiles, geo_type="zcta")
+            
+            zip_irs_data, county_irs_data = irs_future.result()
+            zip_census_data = zip_census_future.result()
+            county_census_data = county_census_future.result()
+            crosswalk = crosswalk_future.result()
+            county_shapes = county_shapes_future.result()
+            zip_shapes = zip_shapes_future.result()
         
         # Step 5: Merge datasets
         logger.info("\n[5/6] Merging datasets...")
@@ -536,11 +731,23 @@ class DataIngester:
         zip_merged['geo_level'] = 'zip'
         county_merged['geo_level'] = 'county'
         
-        # Align columns
-        common_cols = list(set(zip_merged.columns) & set(county_merged.columns))
+        # Align columns (ordered as in zip_merged, so output is deterministic)
+        county_cols = set(county_merged.columns)
+        common_cols = [col for col in zip_merged.columns if col in county_cols]
+        
+        # Give both operands identical dtypes up front so concat stacks the
+        # columns directly instead of upcasting mismatches to object
+        common_dtypes = {}
+        for col in common_cols:
+            zip_dtype, county_dtype = zip_merged[col].dtype, county_merged[col].dtype
+            if zip_dtype != county_dtype:
+                both_numeric = (pd.api.types.is_numeric_dtype(zip_dtype)
+                                and pd.api.types.is_numeric_dtype(county_dtype))
+                common_dtypes[col] = (np.result_type(zip_dtype, county_dtype)
+                                      if both_numeric else 'string')
         final_df = pd.concat([
-            zip_merged[common_cols],
-            county_merged[common_cols]
+            zip_merged[common_cols].astype(common_dtypes),
+            county_merged[common_cols].astype(common_dtypes)
         ], ignore_index=True)
         
         # Step 6: Save processed data
@@ -15,11 +15,13 @@ Usage:
     X, y, pipeline = fe.prepare_features()
 """
 
+import hashlib
 import pandas as pd
 import numpy as np
 import geopandas as gpd
+import joblib
 from pathlib import Path
-from typing import Tuple, List, Optional
+from typing import Dict, Tuple, List, Optional, Union
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.impute import SimpleImputer
@@ -30,22 +32,63 @@ from src.config import (
     PROCESSED_DATA_FILE,
     TARGET_VARIABLE,
     IMPUTATION_STRATEGY,
+    DOWNCAST_NUMERIC,
     NUMERIC_FEATURES_TO_SCALE,
     RANDOM_SEED,
     FEATURE_PIPELINE_FILE,
+    FEATURE_TRANSFORM_FILE,
     SPATIAL_LAG_K_NEIGHBORS
 )
 from src.logger import get_logger
 from src.helpers import (
     load_dataframe,
+    downcast_numeric,
     save_model,
     check_missing_values,
     create_derived_features,
-    calculate_spatial_lag
+    append_columns,
+    calculate_spatial_lag_batch,
+    grouped_mean
 )
 
 logger = get_logger(__name__)
 
+# The feature steps below rely on Copy-on-Write instead of defensive df.copy()
+# calls; it is always enabled from pandas 3.0 on
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+
+def fused_transform(
+    X: Union[pd.DataFrame, np.ndarray],
+    medians: np.ndarray,
+    means: np.ndarray,
+    scales: np.ndarray
+) -> np.ndarray:
+    """
+    Apply median imputation and standard scaling in a single pass.
+    
+    Equivalent to the fitted imputer + scaler pipeline, but works on one
+    output buffer instead of materializing an intermediate array per step.
+    
+    Args:
+        X: Feature matrix with columns in the order the pipeline was fit on
+        medians: Imputer statistics per column
+        means: Scaler means per column
+        scales: Scaler scales per column
+    
+    Returns:
+        np.ndarray: Imputed and scaled float64 feature matrix
+    """
+    out = np.array(X, dtype=np.float64)
+    
+    missing_rows, missing_cols = np.nonzero(np.isnan(out))
+    out[missing_rows, missing_cols] = medians[missing_cols]
+    
+    out -= means
+    out /= scales
+    return out
+
 
 class FeatureEngineer:
     """
@@ -71,6 +114,7 @@ class FeatureEngineer:
         self.y = None
         self.pipeline = None
         self.feature_names = []
+        self._numeric_cols = []
     
     def load_data(self) -> pd.DataFrame:
         """
@@ -81,6 +125,9 @@ class FeatureEngineer:
         """
         logger.info(f"Loading data from {self.data_path}")
         self.data = load_dataframe(self.data_path)
+        if DOWNCAST_NUMERIC:
+            # Keep the target at full precision
+            self.data = downcast_numeric(self.data, exclude=[TARGET_VARIABLE])
         logger.info(f"Loaded {len(self.data)} records with {len(self.data.columns)} columns")
         return self.data
     
@@ -101,41 +148,52 @@ class FeatureEngineer:
         """
         logger.info("Handling missing values...")
         
-        # Check missing values
-        check_missing_values(df, threshold=0.5)
-        
-        df = df.copy()
+        # Count missing values once and reuse the counts below
+        null_counts = df.isna().sum()
+        missing_props = null_counts / len(df)
+        check_missing_values(df, threshold=0.5, missing_props=missing_props)
         
         # Separate numeric and categorical columns
         numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
         categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
         
         # Drop columns with excessive missing values (>80%)
-        missing_props = df.isnull().sum() / len(df)
         cols_to_drop = missing_props[missing_props > 0.8].index.tolist()
         
         if cols_to_drop:
             logger.warning(f"Dropping {len(cols_to_drop)} columns with >80% missing values")
             df = df.drop(columns=cols_to_drop)
         
+        self._numeric_cols = [col for col in numeric_cols if col in df.columns]
+        
+        # Only the remaining columns that actually have gaps need imputing
+        has_null = (missing_props > 0) & (missing_props <= 0.8)
+        numeric_null_cols = [col for col in numeric_cols if has_null[col]]
+        categorical_null_cols = [col for col in categorical_cols if has_null[col]]
+        
+        fill_values = {}
+        
         # Impute numeric columns with median
-        for col in numeric_cols:
-            if col in df.columns and df[col].isnull().any():
-                median_val = df[col].median()
-                df[col].fillna(median_val, inplace=True)
-                logger.debug(f"Imputed {col} with median: {median_val:.2f}")
-        
-        # Impute categorical columns with mode or 'Unknown'
-        for col in categorical_cols:
-            if col in df.columns and df[col].isnull().any():
-                if df[col].mode().empty:
-                    df[col].fillna('Unknown', inplace=True)
-                else:
-                    mode_val = df[col].mode()[0]
-                    df[col].fillna(mode_val, inplace=True)
-                logger.debug(f"Imputed {col} with mode")
-        
-        logger.info(f"Missing value handling complete. Remaining nulls: {df.isnull().sum().sum()}")
+        if numeric_null_cols:
+            fill_values.update(df[numeric_null_cols].median(numeric_only=True).to_dict())
+        
+        # Impute categorical columns with mode, or 'Unknown' for all-NaN columns
+        if categorical_null_cols:
+            modes = df[categorical_null_cols].mode(dropna=True)
+            for col in categorical_null_cols:
+                mode_val = modes[col].iloc[0] if not modes.empty else np.nan
+                fill_values[col] = mode_val if pd.notna(mode_val) else 'Unknown'
+        
+        # fillna returns a new frame, so the caller's DataFrame is left untouched
+        df = df.fillna(fill_values)
+        
+        # Nulls left are those in kept columns that got no usable fill value
+        unfilled = [
+            col for col in df.columns
+            if has_null[col] and pd.isna(fill_values.get(col, np.nan))
+        ]
+        remaining_nulls = null_counts[unfilled].sum()
+        logger.info(f"Missing value handling complete. Remaining nulls: {remaining_nulls}")
         return df
     
     def create_features(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -160,36 +218,54 @@ class FeatureEngineer:
         """
         logger.info("Creating derived features...")
         
-        df = df.copy()
+        original_cols = set(df.columns)
         
         # Use helper function for standard derived features
         df = create_derived_features(df)
         
         # Additional domain-specific features
+        columns = set(df.columns)
+        
+        def values(col: str) -> np.ndarray:
+            return df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        
+        new_cols = {}
         
         # Tax filing rate (returns per capita)
-        if 'num_returns' in df.columns and 'total_population' in df.columns:
-            df['tax_filing_rate'] = df['num_returns'] / (df['total_population'] + 1)
+        if {'num_returns', 'total_population'} <= columns:
+            new_cols['tax_filing_rate'] = values('num_returns') / (values('total_population') + 1)
         
         # Average household income
-        if 'total_agi' in df.columns and 'total_households' in df.columns:
-            df['avg_household_agi'] = df['total_agi'] / (df['total_households'] + 1)
+        if {'total_agi', 'total_households'} <= columns:
+            new_cols['avg_household_agi'] = values('total_agi') / (values('total_households') + 1)
         
         # Business income ratio
-        if 'business_income' in df.columns and 'total_agi' in df.columns:
-            df['business_income_ratio'] = df['business_income'] / (df['total_agi'] + 1)
+        if {'business_income', 'total_agi'} <= columns:
+            new_cols['business_income_ratio'] = values('business_income') / (values('total_agi') + 1)
         
         # Commute burden (long commuters as % of total)
-        if 'long_commute_60plus_min' in df.columns and 'total_commuters' in df.columns:
-            df['long_commute_rate'] = df['long_commute_60plus_min'] / (df['total_commuters'] + 1)
+        if {'long_commute_60plus_min', 'total_commuters'} <= columns:
+            new_cols['long_commute_rate'] = (
+                values('long_commute_60plus_min') / (values('total_commuters') + 1)
+            )
         
         # Housing affordability index
-        if 'median_gross_rent' in df.columns and 'median_household_income' in df.columns:
-            df['rent_burden'] = (df['median_gross_rent'] * 12) / (df['median_household_income'] + 1)
+        if {'median_gross_rent', 'median_household_income'} <= columns:
+            new_cols['rent_burden'] = (
+                (values('median_gross_rent') * 12) / (values('median_household_income') + 1)
+            )
         
         # Age dependency ratio (simplified)
-        if 'median_age' in df.columns:
-            df['age_squared'] = df['median_age'] ** 2
+        if 'median_age' in columns:
+            new_cols['age_squared'] = values('median_age') ** 2
+        
+        df = append_columns(df, new_cols)
+        
+        # Every derived feature is numeric
+        self._numeric_cols = self._numeric_cols + [
+            col for col in df.columns
+            if col not in original_cols and col not in self._numeric_cols
+        ]
         
         logger.info(f"Created derived features. Total columns: {len(df.columns)}")
         return df
@@ -201,6 +277,11 @@ class FeatureEngineer:
         Spatial autocorrelation can be important for income prediction
         as neighboring areas often have similar economic characteristics.
         
+        Features added per variable:
+        - '<var>_spatial_lag': mean over the k nearest neighboring regions
+        - '<var>_state_mean': mean over the other regions in the same state
+          (only when a 'state_fips' column is present)
+        
         Args:
             df: Input DataFrame with geographic information
         
@@ -219,7 +300,7 @@ class FeatureEngineer:
             if not isinstance(df, gpd.GeoDataFrame):
                 gdf = gpd.GeoDataFrame(df, geometry='geometry')
             else:
-                gdf = df.copy()
+                gdf = df
             
             # Remove rows with missing geometry
             gdf = gdf[gdf.geometry.notna()]
@@ -232,15 +313,30 @@ class FeatureEngineer:
             spatial_vars = ['avg_agi_per_return', 'median_household_income', 
                           'unemployment_rate', 'poverty_rate']
             
-            for var in spatial_vars:
-                if var in gdf.columns:
-                    spatial_lag = calculate_spatial_lag(
-                        gdf, var, k_neighbors=SPATIAL_LAG_K_NEIGHBORS
-                    )
-                    gdf[f'{var}_spatial_lag'] = spatial_lag
+            present_vars = [var for var in spatial_vars if var in gdf.columns]
+            if present_vars:
+                spatial_lags = calculate_spatial_lag_batch(
+                    gdf, present_vars, k_neighbors=SPATIAL_LAG_K_NEIGHBORS
+                )
+                
+                # Regional context: mean of each variable across the other
+                # regions in the same state (leave-one-out, like the KD-tree
+                # lag excluding the region itself, so no row sees its own value)
+                if 'state_fips' in gdf.columns:
+                    state_ids, _ = pd.factorize(gdf['state_fips'])
+                    for var in present_vars:
+                        spatial_lags[f'{var}_state_mean'] = grouped_mean(
+                            gdf[var].to_numpy(dtype=np.float64, na_value=np.nan),
+                            state_ids,
+                            leave_one_out=True
+                        )
+                
+                gdf = pd.concat([gdf, spatial_lags], axis=1)
+                self._numeric_cols = self._numeric_cols + spatial_lags.columns.tolist()
             
             logger.info(f"Added spatial lag features for {len(spatial_vars)} variables")
-            return pd.DataFrame(gdf)
+            # Geometry is not a model input; dropping it also leaves a plain DataFrame
+            return gdf.drop(columns=['geometry'])
         
         except Exception as e:
             logger.warning(f"Failed to create spatial features: {e}")
@@ -287,9 +383,57 @@ class FeatureEngineer:
         logger.info(f"Pipeline built with {len(numeric_features)} numeric features")
         return pipeline
     
+    def _features_cache_path(self, include_spatial: bool) -> Optional[Path]:
+        """
+        Build the on-disk cache path for prepare_features output.
+        
+        The key covers the input file (size, mtime and its first MiB) and
+        the settings that change the engineered features.
+        
+        Args:
+            include_spatial: Whether spatial lag features are included
+        
+        Returns:
+            Path: Cache file path, or None if the data file doesn't exist
+        """
+        if not self.data_path.exists():
+            return None
+        
+        stat = self.data_path.stat()
+        settings = (
+            stat.st_size, stat.st_mtime_ns, TARGET_VARIABLE,
+            IMPUTATION_STRATEGY, DOWNCAST_NUMERIC, SPATIAL_LAG_K_NEIGHBORS, include_spatial
+        )
+        
+        digest = hashlib.sha256()
+        with open(self.data_path, 'rb') as f:
+            digest.update(f.read(1 << 20))
+        digest.update(repr(settings).encode())
+        
+        return MODELS_DIR / f"features_cache_{digest.hexdigest()[:16]}.pkl"
+    
+    @staticmethod
+    def get_fused_params(pipeline: Pipeline) -> Dict[str, np.ndarray]:
+        """
+        Extract the fitted imputer and scaler parameters from a pipeline.
+        
+        Args:
+            pipeline: Fitted pipeline from build_preprocessing_pipeline
+        
+        Returns:
+            dict: 'medians', 'means' and 'scales' arrays for fused_transform
+        """
+        numeric = pipeline.named_steps['preprocessor'].named_transformers_['num']
+        return {
+            'medians': numeric.named_steps['imputer'].statistics_,
+            'means': numeric.named_steps['scaler'].mean_,
+            'scales': numeric.named_steps['scaler'].scale_,
+        }
+    
     def prepare_features(
         self,
-        include_spatial: bool = False
+        include_spatial: bool = False,
+        use_cache: bool = True
     ) -> Tuple[pd.DataFrame, pd.Series, Pipeline]:
         """
         Complete feature preparation pipeline.
@@ -305,6 +449,7 @@ class FeatureEngineer:
         
         Args:
             include_spatial: Whether to include spatial lag features
+            use_cache: Reuse (and store) results cached for the same input file
         
         Returns:
             tuple: (X, y, pipeline)
@@ -316,6 +461,16 @@ class FeatureEngineer:
         logger.info("Starting Feature Engineering Pipeline")
         logger.info("=" * 60)
         
+        cache_path = self._features_cache_path(include_spatial) if use_cache else None
+        if cache_path is not None and cache_path.exists():
+            logger.info(f"Loading cached features from {cache_path}")
+            X, y, pipeline = joblib.load(cache_path)
+            self.X = X
+            self.y = y
+            self.pipeline = pipeline
+            self.feature_names = X.columns.tolist()
+            return X, y, pipeline
+        
         # Step 1: Load data
         logger.info("\n[1/7] Loading data...")
         df = self.load_data()
@@ -347,15 +502,16 @@ class FeatureEngineer:
         y = df[TARGET_VARIABLE]
         
         # Identify feature columns (exclude target and identifiers)
-        exclude_cols = [
+        exclude_cols = frozenset([
             TARGET_VARIABLE,
             'zipcode', 'fips', 'county_fips', 'state_fips',
             'county_name', 'geo_level', 'geometry', 'geo'
-        ]
+        ])
         feature_cols = [col for col in df.columns if col not in exclude_cols]
         
-        # Only keep numeric features for modeling
-        X = df[feature_cols].select_dtypes(include=[np.number])
+        # Only keep numeric features for modeling (tracked through the steps above)
+        numeric_cols = set(self._numeric_cols)
+        X = df[[col for col in feature_cols if col in numeric_cols]]
         
         self.feature_names = X.columns.tolist()
         
@@ -370,19 +526,27 @@ class FeatureEngineer:
         # Fit pipeline on training data
         pipeline.fit(X)
         
-        # Transform features
-        X_transformed = pipeline.transform(X)
+        # Transform features (one pass for imputation and scaling)
+        fused_params = self.get_fused_params(pipeline)
+        X_transformed = fused_transform(X, **fused_params)
         X = pd.DataFrame(X_transformed, columns=self.feature_names, index=X.index)
         
-        # Step 7: Save pipeline
+        # Step 7: Save pipeline, plus the raw parameters for sklearn-free inference
         logger.info("\n[7/7] Saving preprocessing pipeline...")
         pipeline_path = MODELS_DIR / FEATURE_PIPELINE_FILE
         save_model(pipeline, pipeline_path)
+        np.savez(MODELS_DIR / FEATURE_TRANSFORM_FILE, **fused_params)
         
         self.X = X
         self.y = y
         self.pipeline = pipeline
         
+        if cache_path is not None:
+            for stale_cache in MODELS_DIR.glob("features_cache_*.pkl"):
+                stale_cache.unlink()
+            joblib.dump((X, y, pipeline), cache_path, compress=3)
+            logger.info(f"Cached features to {cache_path}")
+        
         logger.info("=" * 60)
         logger.info("Feature Engineering Complete!")
         logger.info(f"Final feature matrix: {X.shape}")
@@ -415,8 +579,7 @@ def main():
     print(f"\nTarget variable statistics:")
     print(y.describe())
     print(f"\nFeature columns:")
-    for i, col in enumerate(X.columns, 1):
-        print(f"  {i:2d}. {col}")
+    print("\n".join(f"  {i:2d}. {col}" for i, col in enumerate(X.columns, 1)))
 
 
 if __name__ == "__main__":
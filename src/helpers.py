@@ -5,17 +5,30 @@ Contains shared utility functions used across multiple modules in the project.
 Includes functions for data validation, file I/O, geographic operations, etc.
 """
 
+import hashlib
+import importlib.util
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
-import geopandas as gpd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 import joblib
 from sklearn.neighbors import NearestNeighbors
 from src.logger import get_logger
 
+# geopandas is imported lazily in the functions that need it
+if TYPE_CHECKING:
+    import geopandas as gpd
+
 logger = get_logger(__name__)
 
+# joblib compression for saved models: lz4 is fast enough that saving and
+# loading beat raw pickles; without it, store uncompressed (zlib is slower
+# than no compression at all)
+MODEL_COMPRESSION = ('lz4', 3) if importlib.util.find_spec('lz4') is not None else 0
+
 
 # ============================================================================
 # FILE I/O UTILITIES
@@ -40,7 +53,9 @@ def save_dataframe(
     file_path.parent.mkdir(parents=True, exist_ok=True)
     
     if file_format == "parquet":
-        df.to_parquet(file_path, index=False)
+        # Dictionary encoding keeps repeated strings (states, geo levels) small
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, file_path, compression='zstd', use_dictionary=True)
     elif file_format == "csv":
         df.to_csv(file_path, index=False)
     elif file_format == "pickle":
@@ -76,7 +91,10 @@ def load_dataframe(
         file_format = file_path.suffix.lower().replace(".", "")
     
     if file_format == "parquet":
-        df = pd.read_parquet(file_path)
+        # self_destruct frees Arrow buffers as columns are converted
+        table = pq.read_table(file_path, use_threads=True)
+        df = table.to_pandas(self_destruct=True, split_blocks=True)
+        del table
     elif file_format == "csv":
         df = pd.read_csv(file_path)
     elif file_format in ["pickle", "pkl"]:
@@ -88,6 +106,41 @@ def load_dataframe(
     return df
 
 
+def downcast_numeric(
+    df: pd.DataFrame,
+    exclude: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Downcast numeric columns to the smallest dtype that holds their values.
+    
+    Integers shrink to the narrowest integer type and floats to float32,
+    roughly halving the memory footprint of a typical numeric frame.
+    
+    Args:
+        df: Input DataFrame
+        exclude: Columns to leave at their original precision
+    
+    Returns:
+        pd.DataFrame: DataFrame with downcast numeric columns
+    """
+    excluded = set(exclude or [])
+    downcast = {}
+    
+    for kind, target in (('integer', 'integer'), ('floating', 'float')):
+        for col in df.select_dtypes(include=kind).columns:
+            if col not in excluded:
+                downcast[col] = pd.to_numeric(df[col], downcast=target)
+    
+    if not downcast:
+        return df
+    
+    before = df.memory_usage(deep=False).sum()
+    df = df.assign(**downcast)
+    after = df.memory_usage(deep=False).sum()
+    logger.info(f"Downcast {len(downcast)} numeric columns ({before / 1e6:.1f} MB -> {after / 1e6:.1f} MB)")
+    return df
+
+
 def save_model(model: object, file_path: Path) -> None:
     """
     Save trained model to disk using joblib.
@@ -97,7 +150,7 @@ def save_model(model: object, file_path: Path) -> None:
         file_path: Destination file path
     """
     file_path.parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(model, file_path)
+    joblib.dump(model, file_path, compress=MODEL_COMPRESSION)
     logger.info(f"Saved model to {file_path}")
 
 
@@ -126,29 +179,37 @@ def load_model(file_path: Path) -> object:
 # DATA VALIDATION UTILITIES
 # ============================================================================
 
-def check_missing_values(df: pd.DataFrame, threshold: float = 0.5) -> Dict[str, float]:
+def check_missing_values(
+    df: pd.DataFrame,
+    threshold: float = 0.5,
+    missing_props: Optional[pd.Series] = None
+) -> Dict[str, float]:
     """
     Check for missing values in DataFrame and report columns exceeding threshold.
     
     Args:
         df: Input DataFrame
         threshold: Maximum acceptable proportion of missing values (0-1)
+        missing_props: Precomputed per-column missing proportions (optional)
     
     Returns:
         dict: Dictionary mapping column names to missing value proportions
               for columns exceeding the threshold
     """
-    missing_props = df.isnull().sum() / len(df)
-    problematic = missing_props[missing_props > threshold].to_dict()
+    if missing_props is None:
+        missing_props = df.isna().mean(axis=0)
+    problematic = missing_props[missing_props > threshold]
     
-    if problematic:
-        logger.warning(
-            f"Found {len(problematic)} columns with >{threshold*100}% missing values"
-        )
-        for col, prop in problematic.items():
-            logger.warning(f"  - {col}: {prop*100:.1f}% missing")
+    if problematic.empty:
+        return {}
     
-    return problematic
+    logger.warning(
+        f"Found {len(problematic)} columns with >{threshold*100}% missing values"
+    )
+    for col, prop in problematic.items():
+        logger.warning(f"  - {col}: {prop*100:.1f}% missing")
+    
+    return problematic.to_dict()
 
 
 def validate_dataframe_schema(
@@ -170,7 +231,7 @@ def validate_dataframe_schema(
     Raises:
         ValueError: If validation fails and raise_error is True
     """
-    missing_cols = set(required_columns) - set(df.columns)
+    missing_cols = frozenset(required_columns).difference(df.columns)
     
     if missing_cols:
         error_msg = f"Missing required columns: {', '.join(missing_cols)}"
@@ -183,6 +244,43 @@ def validate_dataframe_schema(
     return True
 
 
+# Quartiles of recently analyzed series, keyed on a digest of their values
+_QUARTILE_CACHE: "OrderedDict[Tuple[str, str], Tuple[float, float]]" = OrderedDict()
+_QUARTILE_CACHE_SIZE = 128
+
+
+def _series_quartiles(series: pd.Series) -> Tuple[float, float]:
+    """
+    Return the (Q1, Q3) quartiles of a series, memoized on its contents.
+    
+    Only numpy-backed numeric series are cached, since their raw bytes
+    identify the values exactly.
+    
+    Args:
+        series: Numeric series to analyze
+    
+    Returns:
+        tuple: (Q1, Q3)
+    """
+    values = series.to_numpy()
+    if values.dtype.kind not in 'iuf':
+        return series.quantile(0.25), series.quantile(0.75)
+    
+    key = (
+        hashlib.blake2b(np.ascontiguousarray(values).tobytes(), digest_size=8).hexdigest(),
+        values.dtype.str
+    )
+    if key in _QUARTILE_CACHE:
+        _QUARTILE_CACHE.move_to_end(key)
+        return _QUARTILE_CACHE[key]
+    
+    quartiles = (series.quantile(0.25), series.quantile(0.75))
+    _QUARTILE_CACHE[key] = quartiles
+    if len(_QUARTILE_CACHE) > _QUARTILE_CACHE_SIZE:
+        _QUARTILE_CACHE.popitem(last=False)
+    return quartiles
+
+
 def detect_outliers_iqr(
     series: pd.Series,
     multiplier: float = 1.5
@@ -197,8 +295,7 @@ def detect_outliers_iqr(
     Returns:
         tuple: (Boolean mask of outliers, count of outliers)
     """
-    Q1 = series.quantile(0.25)
-    Q3 = series.quantile(0.75)
+    Q1, Q3 = _series_quartiles(series)
     IQR = Q3 - Q1
     
     lower_bound = Q1 - multiplier * IQR
@@ -220,8 +317,35 @@ def detect_outliers_iqr(
 # GEOGRAPHIC UTILITIES
 # ============================================================================
 
+def _spatial_neighbor_indices(
+    gdf: "gpd.GeoDataFrame",
+    k_neighbors: int
+) -> np.ndarray:
+    """
+    Find the k nearest neighbors of each region's centroid.
+    
+    Args:
+        gdf: GeoDataFrame with geometry column
+        k_neighbors: Number of nearest neighbors to consider
+    
+    Returns:
+        np.ndarray: (n_regions, k_neighbors) neighbor positions, excluding self
+    """
+    # Get centroids for distance calculations
+    centroids = gdf.geometry.centroid
+    coords = np.column_stack([centroids.x.to_numpy(), centroids.y.to_numpy()])
+    
+    # Fit nearest neighbors (KD-tree suits low-dimensional lon/lat points)
+    nn = NearestNeighbors(n_neighbors=k_neighbors + 1, algorithm='kd_tree', n_jobs=-1)
+    nn.fit(coords)
+    
+    # First column of each row is the region itself
+    _, indices = nn.kneighbors(coords)
+    return indices[:, 1:]
+
+
 def calculate_spatial_lag(
-    gdf: gpd.GeoDataFrame,
+    gdf: "gpd.GeoDataFrame",
     value_column: str,
     k_neighbors: int = 5
 ) -> pd.Series:
@@ -239,30 +363,107 @@ def calculate_spatial_lag(
     Returns:
         pd.Series: Spatial lag values for each region
     """
-    # Get centroids for distance calculations
-    centroids = gdf.geometry.centroid
-    coords = np.array([[point.x, point.y] for point in centroids])
+    lags = calculate_spatial_lag_batch(gdf, [value_column], k_neighbors)
+    return lags[f"{value_column}_spatial_lag"]
+
+
+def calculate_spatial_lag_batch(
+    gdf: "gpd.GeoDataFrame",
+    value_columns: List[str],
+    k_neighbors: int = 5
+) -> pd.DataFrame:
+    """
+    Calculate spatial lag features for several columns at once.
     
-    # Fit nearest neighbors
-    nn = NearestNeighbors(n_neighbors=k_neighbors + 1, algorithm='ball_tree')
-    nn.fit(coords)
+    The neighbor search only depends on geometry, so it is run once and
+    reused for every value column.
     
-    # Get neighbors (excluding self)
-    distances, indices = nn.kneighbors(coords)
+    Args:
+        gdf: GeoDataFrame with geometry column
+        value_columns: Columns to calculate spatial lag for
+        k_neighbors: Number of nearest neighbors to consider
     
-    # Calculate spatial lag as mean of neighbors
-    values = gdf[value_column].values
-    spatial_lags = []
+    Returns:
+        pd.DataFrame: One '<column>_spatial_lag' column per value column
+    """
+    neighbors = _spatial_neighbor_indices(gdf, k_neighbors)
     
-    for idx_array in indices:
-        # Skip first index (self)
-        neighbor_values = values[idx_array[1:]]
-        # Calculate mean, handling NaN values
-        spatial_lag = np.nanmean(neighbor_values)
-        spatial_lags.append(spatial_lag)
+    # Calculate spatial lag as mean of neighbors, handling NaN values
+    lags = {}
+    for col in value_columns:
+        values = gdf[col].to_numpy(dtype=np.float64)
+        lags[f"{col}_spatial_lag"] = np.nanmean(values[neighbors], axis=1)
+        logger.info(f"Calculated spatial lag for '{col}' using {k_neighbors} neighbors")
     
-    logger.info(f"Calculated spatial lag for '{value_column}' using {k_neighbors} neighbors")
-    return pd.Series(spatial_lags, index=gdf.index, name=f"{value_column}_spatial_lag")
+    return pd.DataFrame(lags, index=gdf.index)
+
+
+def grouped_mean(
+    values: np.ndarray,
+    group_ids: np.ndarray,
+    leave_one_out: bool = False
+) -> np.ndarray:
+    """
+    Mean of each row's group, ignoring NaN values.
+    
+    Sorts once and reduces each contiguous group segment with
+    np.add.reduceat, which is much cheaper than a pandas groupby
+    when there are many small groups.
+    
+    Args:
+        values: Values to average
+        group_ids: Integer group label per row (negative labels are ungrouped)
+        leave_one_out: Exclude each row's own value from its group mean, so
+                       the feature doesn't leak the row's own value
+    
+    Returns:
+        np.ndarray: Group mean broadcast back to each row (NaN if ungrouped
+                    or if no other valid value is in the group)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    group_ids = np.asarray(group_ids)
+    result = np.full(len(values), np.nan)
+    if len(values) == 0:
+        return result
+    
+    order = np.argsort(group_ids, kind='stable')
+    sorted_ids = group_ids[order]
+    sorted_vals = values[order]
+    
+    # Segment starts wherever the sorted label changes
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    sizes = np.diff(np.r_[starts, len(values)])
+    
+    valid = ~np.isnan(sorted_vals)
+    own_vals = np.where(valid, sorted_vals, 0.0)
+    sums = np.repeat(np.add.reduceat(own_vals, starts), sizes)
+    counts = np.repeat(np.add.reduceat(valid.astype(np.int64), starts), sizes)
+    
+    if leave_one_out:
+        sums -= own_vals
+        counts -= valid
+    
+    means = np.divide(sums, counts, out=np.full(len(values), np.nan), where=counts > 0)
+    means[sorted_ids < 0] = np.nan
+    
+    result[order] = means
+    return result
+
+
+def _join_key_strings(key: pd.Series, width: int) -> pd.Series:
+    """
+    Convert a join key to strings, zero-padding integer keys.
+    
+    Args:
+        key: FIPS/ZIP key column, numeric or string
+        width: Width to zero-pad integer keys to
+    
+    Returns:
+        pd.Series: Key as a nullable string Series
+    """
+    if pd.api.types.is_numeric_dtype(key):
+        return key.astype('Int64').astype('string').str.zfill(width)
+    return key.astype('string')
 
 
 def merge_geometries(
@@ -270,7 +471,7 @@ def merge_geometries(
     shapefile_path: Path,
     left_on: str,
     right_on: str
-) -> gpd.GeoDataFrame:
+) -> "gpd.GeoDataFrame":
     """
     Merge DataFrame with shapefile geometries.
     
@@ -283,16 +484,34 @@ def merge_geometries(
     Returns:
         gpd.GeoDataFrame: Merged GeoDataFrame with geometries
     """
+    import geopandas as gpd
+    
     # Load shapefile
     gdf_shapes = gpd.read_file(shapefile_path)
     
-    # Merge
-    gdf = df.merge(
-        gdf_shapes[[right_on, 'geometry']],
-        left_on=left_on,
-        right_on=right_on,
-        how='left'
+    # Merge on shared categorical codes so the hash join works on ints
+    # rather than FIPS/ZIP strings. Both keys are normalized to strings first
+    # (integer keys zero-padded to the width of the string side), and the join
+    # runs on a temporary column so the original key columns keep their dtypes.
+    left_key = df[left_on]
+    right_key = gdf_shapes[right_on]
+    width = max(
+        (int(key.astype('string').str.len().max())
+         for key in (left_key, right_key)
+         if not pd.api.types.is_numeric_dtype(key) and key.notna().any()),
+        default=0
     )
+    left_key, right_key = (_join_key_strings(key, width) for key in (left_key, right_key))
+    key_dtype = pd.CategoricalDtype(
+        pd.Index(left_key.unique()).union(pd.Index(right_key.unique())).dropna()
+    )
+    right_cols = ['geometry'] if right_on == left_on else [right_on, 'geometry']
+    gdf = df.assign(_join_key=left_key.astype(key_dtype)).merge(
+        gdf_shapes[right_cols].assign(_join_key=right_key.astype(key_dtype)),
+        on='_join_key',
+        how='left',
+        sort=False
+    ).drop(columns='_join_key')
     
     # Convert to GeoDataFrame
     gdf = gpd.GeoDataFrame(gdf, geometry='geometry')
@@ -305,6 +524,11 @@ def merge_geometries(
 # FEATURE ENGINEERING UTILITIES
 # ============================================================================
 
+def _float_values(df: pd.DataFrame, column: str) -> np.ndarray:
+    """Return a column as a float64 array with missing values as NaN."""
+    return df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
 def create_derived_features(df: pd.DataFrame) -> pd.DataFrame:
     """
     Create derived features from existing columns.
@@ -318,48 +542,95 @@ def create_derived_features(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame with additional derived features
     """
-    df = df.copy()
-    
-    # Income ratios (if wage and dividend data available)
-    if 'total_wages' in df.columns and 'total_income' in df.columns:
-        df['wages_ratio'] = df['total_wages'] / (df['total_income'] + 1)
-    
-    if 'dividends' in df.columns and 'total_income' in df.columns:
-        df['dividends_ratio'] = df['dividends'] / (df['total_income'] + 1)
-    
-    # Log transformations for skewed income variables
-    income_cols = [col for col in df.columns if 'income' in col.lower()]
-    for col in income_cols:
-        if df[col].dtype in [np.float64, np.int64] and (df[col] > 0).any():
-            df[f'log_{col}'] = np.log1p(df[col])
+    columns = set(df.columns)
+    new_cols: Dict[str, np.ndarray] = {}
+    
+    # Income ratios (if wage and dividend data available), sharing one denominator
+    if 'total_income' in columns:
+        income_denominator = _float_values(df, 'total_income') + 1
+        
+        if 'total_wages' in columns:
+            new_cols['wages_ratio'] = _float_values(df, 'total_wages') / income_denominator
+        
+        if 'dividends' in columns:
+            new_cols['dividends_ratio'] = _float_values(df, 'dividends') / income_denominator
+    
+    # Log transformations for skewed income variables, as one (N, k) block
+    income_cols = [
+        col for col in df.columns
+        if 'income' in col.lower()
+        and pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+    ]
+    if income_cols:
+        income_block = df[income_cols].to_numpy(dtype=np.float64)
+        has_positive = (income_block > 0).any(axis=0)
+        log_block = np.log1p(income_block[:, has_positive])
+        log_cols = [col for col, keep in zip(income_cols, has_positive) if keep]
+        new_cols.update((f'log_{col}', log_block[:, i]) for i, col in enumerate(log_cols))
     
     # Population density (if area is available)
-    if 'total_population' in df.columns and 'area_sq_km' in df.columns:
-        df['pop_density'] = df['total_population'] / (df['area_sq_km'] + 0.1)
+    if {'total_population', 'area_sq_km'} <= columns:
+        new_cols['pop_density'] = (
+            _float_values(df, 'total_population') / (_float_values(df, 'area_sq_km') + 0.1)
+        )
     
     # Housing ownership rate
-    if 'owner_occupied_housing' in df.columns and 'total_households' in df.columns:
-        df['owner_occupied_rate'] = df['owner_occupied_housing'] / (df['total_households'] + 1)
+    if {'owner_occupied_housing', 'total_households'} <= columns:
+        new_cols['owner_occupied_rate'] = (
+            _float_values(df, 'owner_occupied_housing')
+            / (_float_values(df, 'total_households') + 1)
+        )
     
     # Unemployment rate
-    if 'unemployed' in df.columns and 'labor_force' in df.columns:
-        df['unemployment_rate'] = df['unemployed'] / (df['labor_force'] + 1)
+    if {'unemployed', 'labor_force'} <= columns:
+        new_cols['unemployment_rate'] = (
+            _float_values(df, 'unemployed') / (_float_values(df, 'labor_force') + 1)
+        )
     
     # Poverty rate
-    if 'poverty_count' in df.columns and 'poverty_denominator' in df.columns:
-        df['poverty_rate'] = df['poverty_count'] / (df['poverty_denominator'] + 1)
+    if {'poverty_count', 'poverty_denominator'} <= columns:
+        new_cols['poverty_rate'] = (
+            _float_values(df, 'poverty_count') / (_float_values(df, 'poverty_denominator') + 1)
+        )
     
     # Education rate (bachelor's degree or higher)
-    if 'bachelors_degree' in df.columns and 'total_population_25plus' in df.columns:
-        df['education_rate'] = (
-            (df['bachelors_degree'] + df.get('masters_degree', 0) + df.get('doctorate_degree', 0))
-            / (df['total_population_25plus'] + 1)
-        )
+    if {'bachelors_degree', 'total_population_25plus'} <= columns:
+        degrees = _float_values(df, 'bachelors_degree')
+        for col in ('masters_degree', 'doctorate_degree'):
+            if col in columns:
+                degrees = degrees + _float_values(df, col)
+        new_cols['education_rate'] = degrees / (_float_values(df, 'total_population_25plus') + 1)
+    
+    df = append_columns(df, new_cols)
     
-    logger.info(f"Created {len(df.columns) - len(df.columns)} derived features")
+    logger.info(f"Created {len(new_cols)} derived features")
     return df
 
 
+def append_columns(df: pd.DataFrame, new_cols: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    Attach several new columns to a DataFrame in a single concat.
+    
+    Existing columns with the same name are replaced, matching the
+    behaviour of repeated ``df[name] = values`` assignments.
+    
+    Args:
+        df: Input DataFrame
+        new_cols: Mapping of column name to values aligned with df's rows
+    
+    Returns:
+        pd.DataFrame: DataFrame with the new columns appended
+    """
+    if not new_cols:
+        return df
+    
+    replaced = [col for col in new_cols if col in df.columns]
+    if replaced:
+        df = df.drop(columns=replaced)
+    
+    return pd.concat([df, pd.DataFrame(new_cols, index=df.index)], axis=1)
+
+
 def get_feature_importance_dict(
     model,
     feature_names: List[str]
@@ -14,6 +14,9 @@ Usage:
     python src/interpret.py
 """
 
+import hashlib
+import importlib.util
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -21,10 +24,11 @@ import seaborn as sns
 from pathlib import Path
 from typing import List, Optional, Tuple
 import shap
-from sklearn.inspection import permutation_importance
+from joblib import Parallel, delayed
 from src.config import (
     MODELS_DIR,
     FEATURE_IMPORTANCE_DIR,
+    SHAP_CACHE_DIR,
     BEST_MODEL_FILE,
     RANDOM_SEED
 )
@@ -34,6 +38,15 @@ from src.features import FeatureEngineer
 
 logger = get_logger(__name__)
 
+# FastTreeSHAP is an optional, faster drop-in for shap.TreeExplainer; it is
+# imported where the explainer is built
+FASTTREESHAP_AVAILABLE = importlib.util.find_spec("fasttreeshap") is not None
+
+# datashader (optional) rasterizes large SHAP point clouds much faster than
+# matplotlib scatter; "auto" plotting switches to it above this many samples
+DATASHADER_AVAILABLE = importlib.util.find_spec("datashader") is not None
+DATASHADER_MIN_SAMPLES = 1000
+
 # Set plotting style
 sns.set_style("whitegrid")
 plt.rcParams['figure.dpi'] = 100
@@ -51,6 +64,7 @@ class ModelInterpreter:
         y_test: Test target
         feature_names: List of feature names
         shap_values: SHAP values for test set
+        shap_sample: Test rows the SHAP values were computed for
         explainer: SHAP explainer object
     """
     
@@ -74,6 +88,15 @@ class ModelInterpreter:
         self.feature_names = None
         self.shap_values = None
         self.explainer = None
+        self.shap_sample = None
+        self._model_path = None
+        
+        # Mean |SHAP| per feature, with the SHAP array it was computed from
+        self._mean_abs_shap = None
+        self._mean_abs_shap_source = None
+        
+        # (model id, sample digest) -> (explainer, SHAP values)
+        self._shap_cache = {}
         
         # Create output directory
         FEATURE_IMPORTANCE_DIR.mkdir(parents=True, exist_ok=True)
@@ -86,6 +109,7 @@ class ModelInterpreter:
         if self.model is None:
             model_path = MODELS_DIR / BEST_MODEL_FILE
             self.model = load_model(model_path)
+            self._model_path = model_path
             logger.info(f"Loaded model from {model_path}")
         
         # Prepare features if not provided
@@ -103,12 +127,135 @@ class ModelInterpreter:
         
         self.feature_names = self.X_test.columns.tolist()
     
+    def _build_tree_explainer(self, model_type: str):
+        """
+        Build a TreeSHAP explainer, preferring FastTreeSHAP when installed.
+        
+        FastTreeSHAP returns the same SHAP value arrays as shap.TreeExplainer
+        but avoids redundant path enumeration and runs across all cores.
+        
+        Args:
+            model_type: Model class name (for logging)
+        
+        Returns:
+            Tree explainer exposing shap_values()
+        """
+        if FASTTREESHAP_AVAILABLE:
+            import fasttreeshap
+            logger.info(f"Using FastTreeSHAP TreeExplainer for {model_type}")
+            return fasttreeshap.TreeExplainer(
+                self.model, algorithm="auto", n_jobs=-1, shortcut=False
+            )
+        
+        logger.info(f"Using TreeExplainer for {model_type}")
+        return shap.TreeExplainer(self.model)
+    
+    def _native_tree_shap(self, X_sample: pd.DataFrame, model_type: str) -> np.ndarray:
+        """
+        Compute exact TreeSHAP values with XGBoost's or LightGBM's built-in
+        contribution prediction.
+        
+        Both libraries implement TreeSHAP in C++ across all cores without
+        holding the GIL, which is much faster than shap.TreeExplainer.
+        
+        Args:
+            X_sample: Samples to explain
+            model_type: Model class name
+        
+        Returns:
+            np.ndarray: SHAP values (n_samples, n_features)
+        """
+        if 'XGB' in model_type:
+            import xgboost as xgb
+            contributions = self.model.get_booster().predict(
+                xgb.DMatrix(X_sample), pred_contribs=True
+            )
+        else:
+            contributions = self.model.predict(X_sample, pred_contrib=True)
+        
+        # Last column holds the expected value (bias term)
+        return np.asarray(contributions)[:, :-1]
+    
+    def _shap_disk_cache_path(self, sample_digest: str) -> Optional[Path]:
+        """
+        Build the on-disk SHAP cache path for a model loaded from disk.
+        
+        The name is ``shap_values_<path>_<version>_<sample>.npy``: digests of
+        the model file path, its size and mtime, and the explained sample, so
+        re-runs on an unchanged model skip TreeSHAP entirely.
+        
+        Args:
+            sample_digest: Digest of the explained samples
+        
+        Returns:
+            Path: Cache file path, or None if the model wasn't loaded from disk
+        """
+        if self._model_path is None:
+            return None
+        
+        stat = self._model_path.stat()
+        path_digest = hashlib.blake2b(
+            str(self._model_path.resolve()).encode(), digest_size=8
+        ).hexdigest()
+        version_digest = hashlib.blake2b(
+            f"{stat.st_size}:{stat.st_mtime_ns}".encode(), digest_size=8
+        ).hexdigest()
+        return SHAP_CACHE_DIR / f"shap_values_{path_digest}_{version_digest}_{sample_digest}.npy"
+    
+    def _deep_framework(self) -> Optional[str]:
+        """
+        Detect whether the model is a Keras or PyTorch network.
+        
+        Only checks frameworks that are already imported, since a model
+        from either one can't exist otherwise.
+        
+        Returns:
+            str: 'torch' or 'keras', or None for other models
+        """
+        torch = sys.modules.get('torch')
+        if torch is not None and isinstance(self.model, torch.nn.Module):
+            return 'torch'
+        
+        tf = sys.modules.get('tensorflow')
+        if tf is not None and isinstance(self.model, tf.keras.Model):
+            return 'keras'
+        
+        return None
+    
+    def _deep_shap(self, X_sample: pd.DataFrame) -> Tuple[object, np.ndarray]:
+        """
+        Compute SHAP values for a neural network with DeepExplainer.
+        
+        Args:
+            X_sample: Samples to explain
+        
+        Returns:
+            tuple: (explainer, SHAP values of shape (n_samples, n_features))
+        """
+        background = shap.sample(self.X_test, min(100, len(self.X_test))).to_numpy(np.float32)
+        data = X_sample.to_numpy(np.float32)
+        
+        if self._deep_framework() == 'torch':
+            import torch
+            background, data = torch.from_numpy(background), torch.from_numpy(data)
+        
+        explainer = shap.DeepExplainer(self.model, background)
+        shap_values = np.asarray(explainer.shap_values(data))
+        
+        # Single-output regressors come back with a trailing output axis
+        if shap_values.ndim == 3 and shap_values.shape[-1] == 1:
+            shap_values = shap_values[..., 0]
+        
+        return explainer, shap_values
+    
     def compute_shap_values(self, sample_size: Optional[int] = 100) -> np.ndarray:
         """
         Compute SHAP values for model predictions.
         
-        Uses TreeExplainer for tree-based models (faster)
-        or KernelExplainer for other models.
+        Uses the models' native TreeSHAP for XGBoost/LightGBM, TreeExplainer
+        for random forests (via FastTreeSHAP when installed), LinearExplainer
+        for linear models, DeepExplainer for Keras/PyTorch networks and
+        KernelExplainer only as a last resort.
         
         Args:
             sample_size: Number of samples to use for SHAP computation
@@ -130,19 +277,56 @@ class ModelInterpreter:
             X_sample = self.X_test.iloc[sample_indices]
         else:
             X_sample = self.X_test
+        self.shap_sample = X_sample
+        
+        # Reuse SHAP values already computed for this model and sample
+        sample_digest = hashlib.blake2b(
+            pd.util.hash_pandas_object(X_sample, index=False).to_numpy().tobytes(),
+            digest_size=8
+        ).hexdigest()
+        cache_key = (id(self.model), sample_digest)
+        if cache_key in self._shap_cache:
+            logger.info("Reusing cached SHAP values")
+            self.explainer, self.shap_values = self._shap_cache[cache_key]
+            return self.shap_values
+        
+        disk_cache_path = self._shap_disk_cache_path(sample_digest)
+        if disk_cache_path is not None and disk_cache_path.exists():
+            logger.info(f"Loading cached SHAP values from {disk_cache_path}")
+            self.explainer = None
+            self.shap_values = np.load(disk_cache_path)
+            self._shap_cache[cache_key] = (self.explainer, self.shap_values)
+            return self.shap_values
         
         # Determine appropriate explainer based on model type
         model_type = type(self.model).__name__
         
         try:
-            if 'XGB' in model_type or 'LightGBM' in model_type or 'RandomForest' in model_type:
+            if 'XGB' in model_type or 'LGBM' in model_type or 'LightGBM' in model_type:
+                # Gradient-boosted models ship their own multithreaded TreeSHAP
+                logger.info(f"Using native TreeSHAP for {model_type}")
+                self.explainer = None
+                self.shap_values = self._native_tree_shap(X_sample, model_type)
+            elif 'RandomForest' in model_type:
                 # Use TreeExplainer for tree-based models
-                logger.info(f"Using TreeExplainer for {model_type}")
-                self.explainer = shap.TreeExplainer(self.model)
+                self.explainer = self._build_tree_explainer(model_type)
+                self.shap_values = self.explainer.shap_values(X_sample)
+            elif type(self.model).__module__.startswith('sklearn.linear_model'):
+                # Linear models have closed-form SHAP values
+                logger.info(f"Using LinearExplainer for {model_type}")
+                background = shap.sample(self.X_test, min(100, len(self.X_test)))
+                self.explainer = shap.LinearExplainer(self.model, background)
                 self.shap_values = self.explainer.shap_values(X_sample)
+            elif self._deep_framework() is not None:
+                # Neural networks need a single backward pass per sample
+                logger.info(f"Using DeepExplainer for {model_type}")
+                self.explainer, self.shap_values = self._deep_shap(X_sample)
             else:
-                # Use KernelExplainer for other models
-                logger.info(f"Using KernelExplainer for {model_type}")
+                # Use KernelExplainer for other models (last resort, very slow)
+                logger.warning(
+                    f"No specialized SHAP explainer for {model_type}; "
+                    "falling back to KernelExplainer, which can be very slow"
+                )
                 
                 # Use smaller background dataset for kernel explainer
                 background = shap.sample(self.X_test, min(50, len(self.X_test)))
@@ -158,10 +342,23 @@ class ModelInterpreter:
             self.shap_values = None
             return None
         
+        self._shap_cache[cache_key] = (self.explainer, self.shap_values)
+        if disk_cache_path is not None:
+            # Keep a single cache entry per model file
+            path_digest = disk_cache_path.name.split('_')[2]
+            for stale_cache in SHAP_CACHE_DIR.glob(f"shap_values_{path_digest}_*.npy"):
+                stale_cache.unlink()
+            SHAP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            np.save(disk_cache_path, self.shap_values)
+        
         logger.info(f"SHAP values computed. Shape: {self.shap_values.shape}")
         return self.shap_values
     
-    def plot_shap_summary(self, save_path: Optional[Path] = None) -> None:
+    def plot_shap_summary(
+        self,
+        save_path: Optional[Path] = None,
+        backend: str = "auto"
+    ) -> None:
         """
         Create SHAP summary plot (beeswarm plot).
         
@@ -171,6 +368,9 @@ class ModelInterpreter:
         
         Args:
             save_path: Path to save plot (optional)
+            backend: 'matplotlib', 'datashader', or 'auto' (datashader when
+                     installed and there are more than DATASHADER_MIN_SAMPLES
+                     explained samples)
         """
         if self.shap_values is None:
             logger.warning("SHAP values not computed. Skipping summary plot.")
@@ -178,23 +378,89 @@ class ModelInterpreter:
         
         logger.info("Generating SHAP summary plot...")
         
-        plt.figure(figsize=(12, 8))
-        shap.summary_plot(
-            self.shap_values,
-            self.X_test if len(self.X_test) <= 100 else self.X_test.iloc[:100],
-            feature_names=self.feature_names,
-            show=False
-        )
-        plt.tight_layout()
-        
         if save_path is None:
             save_path = FEATURE_IMPORTANCE_DIR / "shap_summary.png"
         
+        if backend == "auto":
+            use_datashader = DATASHADER_AVAILABLE and len(self.shap_values) > DATASHADER_MIN_SAMPLES
+        else:
+            use_datashader = backend == "datashader"
+            if use_datashader and not DATASHADER_AVAILABLE:
+                logger.warning("datashader not installed. Falling back to matplotlib.")
+                use_datashader = False
+        
+        if use_datashader:
+            self._plot_shap_summary_datashader()
+        else:
+            plt.figure(figsize=(12, 8))
+            shap.summary_plot(
+                self.shap_values,
+                self.shap_sample,
+                feature_names=self.feature_names,
+                show=False
+            )
+        plt.tight_layout()
+        
         plt.savefig(save_path, bbox_inches='tight')
         plt.close()
         
         logger.info(f"SHAP summary plot saved to {save_path}")
     
+    def _plot_shap_summary_datashader(self, max_display: int = 20) -> None:
+        """
+        Draw a beeswarm-style SHAP summary by rasterizing each feature's
+        points with datashader, then showing the stacked image in matplotlib.
+        
+        Points are colored by feature value (blue = low, red = high) as in
+        shap.summary_plot.
+        
+        Args:
+            max_display: Number of top features to display
+        """
+        import datashader as ds
+        import datashader.transfer_functions as tf
+        
+        shap_values = np.asarray(self.shap_values)
+        n_samples = len(shap_values)
+        mean_abs_shap = self._get_mean_abs_shap()
+        order = np.argsort(mean_abs_shap)[::-1][:max_display]
+        
+        x_min, x_max = shap_values[:, order].min(), shap_values[:, order].max()
+        if x_min == x_max:
+            x_min, x_max = x_min - 1, x_max + 1
+        canvas = ds.Canvas(
+            plot_width=800, plot_height=40,
+            x_range=(x_min, x_max), y_range=(-0.5, 0.5)
+        )
+        rng = np.random.RandomState(RANDOM_SEED)
+        
+        rows = []
+        for i in order:
+            # Scale feature values to [0, 1] for coloring, robust to outliers
+            values = self.shap_sample.iloc[:, i].to_numpy(dtype=np.float64)
+            low, high = np.nanpercentile(values, [5, 95])
+            scaled = np.clip((values - low) / ((high - low) or 1.0), 0, 1)
+            
+            points = pd.DataFrame({
+                'shap_value': shap_values[:, i],
+                'jitter': rng.uniform(-0.4, 0.4, n_samples),
+                'feature_value': scaled
+            })
+            agg = canvas.points(points, 'shap_value', 'jitter', ds.mean('feature_value'))
+            image = tf.shade(agg, cmap=['#008afb', '#ff0052'], how='linear', span=(0, 1))
+            rows.append(np.asarray(tf.set_background(image, 'white').to_pil().convert('RGB')))
+        
+        plt.figure(figsize=(12, 8))
+        plt.imshow(
+            np.vstack(rows),
+            aspect='auto',
+            extent=(x_min, x_max, len(order) - 0.5, -0.5)
+        )
+        plt.yticks(range(len(order)), [self.feature_names[i] for i in order])
+        plt.axvline(0, color='gray', linewidth=0.8)
+        plt.xlabel('SHAP value (impact on model output)')
+        plt.title(f'SHAP Summary ({n_samples} samples)')
+    
     def plot_shap_bar(self, save_path: Optional[Path] = None, top_n: int = 20) -> None:
         """
         Create SHAP bar plot showing mean absolute SHAP values.
@@ -209,15 +475,25 @@ class ModelInterpreter:
         
         logger.info("Generating SHAP bar plot...")
         
+        # Draw the bars directly instead of going through shap.summary_plot,
+        # which builds the full beeswarm point layout first
+        mean_abs_shap = self._get_mean_abs_shap()
+        order = np.argsort(mean_abs_shap)[::-1][:top_n]
+        
         plt.figure(figsize=(10, 8))
-        shap.summary_plot(
-            self.shap_values,
-            self.X_test if len(self.X_test) <= 100 else self.X_test.iloc[:100],
-            feature_names=self.feature_names,
-            plot_type="bar",
-            max_display=top_n,
-            show=False
+        plt.barh(
+            range(len(order)),
+            mean_abs_shap[order],
+            color='steelblue',
+            edgecolor='black',
+            alpha=0.7
         )
+        plt.yticks(range(len(order)), [self.feature_names[i] for i in order])
+        plt.xlabel('mean(|SHAP value|) (average impact on model output)')
+        plt.ylabel('Feature')
+        plt.title(f'Top {top_n} Features by Mean |SHAP|')
+        plt.gca().invert_yaxis()
+        plt.grid(axis='x', alpha=0.3)
         plt.tight_layout()
         
         if save_path is None:
@@ -253,7 +529,8 @@ class ModelInterpreter:
             save_dir = FEATURE_IMPORTANCE_DIR / "dependence"
         save_dir.mkdir(parents=True, exist_ok=True)
         
-        X_sample = self.X_test if len(self.X_test) <= 100 else self.X_test.iloc[:100]
+        # Feature values of the rows the SHAP values were computed for
+        X_sample = self.shap_sample
         
         for feature in feature_names:
             if feature not in self.feature_names:
@@ -280,40 +557,104 @@ class ModelInterpreter:
             except Exception as e:
                 logger.warning(f"Failed to create dependence plot for {feature}: {e}")
     
+    def _batched_permutation_importance(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        n_repeats: int
+    ) -> np.ndarray:
+        """
+        Permutation importance (decrease in R²) with one predict call per feature.
+        
+        All n_repeats permutations of a feature are stacked into one tall
+        matrix, so the model's per-call overhead is paid once per feature
+        rather than once per repeat. Features run in parallel threads, since
+        tree-model prediction releases the GIL.
+        
+        Args:
+            X: Evaluation features
+            y: Evaluation target
+            n_repeats: Number of times to permute each feature
+        
+        Returns:
+            np.ndarray: Importances of shape (n_features, n_repeats)
+        """
+        X_values = X.to_numpy()
+        y_values = y.to_numpy(dtype=np.float64)
+        n_samples, n_features = X_values.shape
+        
+        total_ss = ((y_values - y_values.mean()) ** 2).sum()
+        baseline_pred = np.asarray(self.model.predict(X), dtype=np.float64)
+        baseline_score = 1 - ((y_values - baseline_pred) ** 2).sum() / total_ss
+        
+        seeds = np.random.RandomState(RANDOM_SEED).randint(
+            np.iinfo(np.int32).max, size=n_features
+        )
+        
+        def permuted_scores(col: int) -> np.ndarray:
+            rng = np.random.RandomState(seeds[col])
+            X_big = np.tile(X_values, (n_repeats, 1))
+            for r in range(n_repeats):
+                rows = slice(r * n_samples, (r + 1) * n_samples)
+                X_big[rows, col] = X_values[rng.permutation(n_samples), col]
+            
+            pred = np.asarray(
+                self.model.predict(pd.DataFrame(X_big, columns=X.columns)), dtype=np.float64
+            ).reshape(n_repeats, n_samples)
+            scores = 1 - ((pred - y_values) ** 2).sum(axis=1) / total_ss
+            return baseline_score - scores
+        
+        # Threads share the fitted model instead of pickling it to worker
+        # processes; with fewer than 3 features the pool isn't worth starting
+        n_jobs = -1 if n_features >= 3 else 1
+        results = Parallel(n_jobs=n_jobs, backend="threading")(
+            delayed(permuted_scores)(col) for col in range(n_features)
+        )
+        return np.vstack(results)
+    
     def compute_permutation_importance(
         self,
         n_repeats: int = 10,
-        save_path: Optional[Path] = None
+        save_path: Optional[Path] = None,
+        max_samples: int = 2000
     ) -> pd.DataFrame:
         """
         Compute permutation importance for features.
         
         Permutation importance measures the decrease in model performance
-        when a feature's values are randomly shuffled.
+        when a feature's values are randomly shuffled. It is a Monte Carlo
+        estimate, so a random subset of the test set is enough for a stable
+        feature ranking.
         
         Args:
             n_repeats: Number of times to permute each feature
             save_path: Path to save results (optional)
+            max_samples: Maximum number of test rows to evaluate on
         
         Returns:
             pd.DataFrame: Feature importance scores
         """
         logger.info("Computing permutation importance...")
         
-        result = permutation_importance(
-            self.model,
-            self.X_test,
-            self.y_test,
-            n_repeats=n_repeats,
-            random_state=RANDOM_SEED,
-            n_jobs=-1
+        X_eval, y_eval = self.X_test, self.y_test
+        if len(X_eval) > max_samples:
+            logger.info(f"Sampling {max_samples} instances for permutation importance")
+            sample_indices = np.random.RandomState(RANDOM_SEED).choice(
+                len(X_eval),
+                size=max_samples,
+                replace=False
+            )
+            X_eval, y_eval = X_eval.iloc[sample_indices], y_eval.iloc[sample_indices]
+        
+        importances = self._batched_permutation_importance(
+            X_eval, y_eval, n_repeats=n_repeats
         )
         
         # Create DataFrame with results
         importance_df = pd.DataFrame({
             'feature': self.feature_names,
-            'importance_mean': result.importances_mean,
-            'importance_std': result.importances_std
+            'importance_mean': importances.mean(axis=1),
+            'importance_std': importances.std(axis=1)
         }).sort_values('importance_mean', ascending=False)
         
         if save_path is None:
@@ -368,6 +709,18 @@ class ModelInterpreter:
         
         logger.info(f"Permutation importance plot saved to {save_path}")
     
+    def _get_mean_abs_shap(self) -> np.ndarray:
+        """
+        Mean absolute SHAP value per feature, cached until SHAP values change.
+        
+        Returns:
+            np.ndarray: Mean |SHAP| for each feature
+        """
+        if self._mean_abs_shap_source is not self.shap_values:
+            self._mean_abs_shap = np.abs(self.shap_values).mean(axis=0)
+            self._mean_abs_shap_source = self.shap_values
+        return self._mean_abs_shap
+    
     def get_top_features(self, n: int = 10) -> List[str]:
         """
         Get top N most important features based on mean absolute SHAP values.
@@ -382,11 +735,12 @@ class ModelInterpreter:
             logger.warning("SHAP values not computed. Cannot determine top features.")
             return []
         
-        # Calculate mean absolute SHAP values
-        mean_abs_shap = np.abs(self.shap_values).mean(axis=0)
+        mean_abs_shap = self._get_mean_abs_shap()
         
-        # Get indices of top N features
-        top_indices = np.argsort(mean_abs_shap)[-n:][::-1]
+        # Get indices of top N features (partition, then sort only those N)
+        k = min(n, len(mean_abs_shap))
+        top_indices = np.argpartition(mean_abs_shap, -k)[-k:]
+        top_indices = top_indices[np.argsort(-mean_abs_shap[top_indices])]
         
         top_features = [self.feature_names[i] for i in top_indices]
         
@@ -9,7 +9,8 @@ import logging
 import sys
 from pathlib import Path
 from typing import Optional
-from src.config import LOG_LEVEL, LOG_FORMAT, LOG_DATE_FORMAT, BASE_DIR
+from src import config
+from src.config import LOG_FORMAT, LOG_DATE_FORMAT, BASE_DIR
 
 
 def setup_logger(
@@ -36,8 +37,8 @@ def setup_logger(
     # Create logger
     logger = logging.getLogger(name)
     
-    # Set level from parameter or config
-    log_level = level or LOG_LEVEL
+    # Set level from parameter or config (looked up at call time)
+    log_level = level or config.LOG_LEVEL
     logger.setLevel(getattr(logging, log_level.upper()))
     
     # Prevent duplicate handlers
@@ -52,7 +52,7 @@ def load_irs_data():
     }
     
     print("Extracting relevant columns...")
-    df_zip = df[list(zip_columns.keys())].rename(columns=zip_columns).copy()
+    df_zip = df[list(zip_columns)].rename(columns=zip_columns)
     
     # Aggregate by ZIP code (sum across income brackets)
     print("Aggregating data by ZIP code...")
@@ -12,8 +12,10 @@ import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.features import FeatureEngineer
-from src.helpers import create_derived_features
+from src.features import FeatureEngineer, fused_transform
+from src.helpers import (
+    create_derived_features, calculate_spatial_lag_batch, grouped_mean, merge_geometries
+)
 
 
 class TestFeatureEngineer:
@@ -72,6 +74,21 @@ class TestFeatureEngineer:
         assert pipeline is not None
         assert hasattr(pipeline, 'fit')
         assert hasattr(pipeline, 'transform')
+    
+    def test_fused_transform_matches_pipeline(self):
+        """Test fused imputation + scaling reproduces the sklearn pipeline."""
+        X = pd.DataFrame({
+            'feature1': [1.0, np.nan, 3.0, 4.0],
+            'feature2': [10.0, 20.0, np.nan, 40.0],
+        })
+        
+        engineer = FeatureEngineer()
+        pipeline = engineer.build_preprocessing_pipeline(X.columns.tolist())
+        pipeline.fit(X)
+        
+        result = fused_transform(X, **engineer.get_fused_params(pipeline))
+        
+        np.testing.assert_allclose(result, pipeline.transform(X))
 
 
 def test_create_derived_features():
@@ -95,6 +112,64 @@ def test_create_derived_features():
         assert np.isclose(result['unemployment_rate'].iloc[0], 100 / 1001)
 
 
+def test_calculate_spatial_lag_batch():
+    """Test batched spatial lag matches per-region neighbor means."""
+    gpd = pytest.importorskip("geopandas")
+    
+    gdf = gpd.GeoDataFrame(
+        {'a': [1.0, 2.0, 3.0, 10.0], 'b': [4.0, np.nan, 6.0, 8.0]},
+        geometry=gpd.points_from_xy([0, 1, 2, 10], [0, 0, 0, 0])
+    )
+    
+    result = calculate_spatial_lag_batch(gdf, ['a', 'b'], k_neighbors=1)
+    
+    assert list(result.columns) == ['a_spatial_lag', 'b_spatial_lag']
+    assert result['a_spatial_lag'].iloc[0] == 2.0
+    assert result['a_spatial_lag'].iloc[3] == 3.0
+    assert np.isnan(result['b_spatial_lag'].iloc[0])
+
+
+def test_grouped_mean():
+    """Test grouped mean broadcasts NaN-aware group means back to rows."""
+    values = np.array([1.0, 10.0, 3.0, np.nan, 5.0])
+    group_ids = np.array([0, 1, 0, 1, -1])
+    
+    result = grouped_mean(values, group_ids)
+    
+    np.testing.assert_allclose(result[:4], [2.0, 10.0, 2.0, 10.0])
+    assert np.isnan(result[4])
+
+
+def test_grouped_mean_leave_one_out():
+    """Test leave-one-out group means exclude each row's own value."""
+    values = np.array([1.0, 10.0, 3.0, np.nan, 5.0, 7.0])
+    group_ids = np.array([0, 1, 0, 1, 0, 2])
+    
+    result = grouped_mean(values, group_ids, leave_one_out=True)
+    
+    np.testing.assert_allclose(result[[0, 2, 4]], [4.0, 3.0, 2.0])
+    assert np.isnan(result[1])  # no other valid value in group 1
+    assert result[3] == 10.0    # NaN row sees the rest of its group
+    assert np.isnan(result[5])  # singleton group
+
+
+def test_merge_geometries_mixed_key_dtypes(tmp_path):
+    """Test integer keys match zero-padded string keys and keep their dtype."""
+    gpd = pytest.importorskip("geopandas")
+    from shapely.geometry import Point
+    
+    gpd.GeoDataFrame(
+        {'GEOID': ['01001', '06037'], 'geometry': [Point(0, 0), Point(1, 1)]},
+        crs="EPSG:4326"
+    ).to_file(tmp_path / "shapes.shp")
+    df = pd.DataFrame({'fips': [1001, 6037, 9999], 'value': [1, 2, 3]})
+    
+    result = merge_geometries(df, tmp_path / "shapes.shp", 'fips', 'GEOID')
+    
+    assert result['fips'].dtype == df['fips'].dtype
+    assert result['geometry'].notna().tolist() == [True, True, False]
+
+
 def test_feature_validation():
     """Test feature validation."""
     # Test that feature names are strings
@@ -33,7 +33,9 @@ print("STEP 1: Loading Processed Data")
 print("-" * 70)
 
 data_file = DATA_PROCESSED_DIR / 'merged.parquet'
-df = pd.read_parquet(data_file)
+# Arrow-backed load (no per-column Arrow -> NumPy copy); features are
+# converted to NumPy once in STEP 2
+df = pd.read_parquet(data_file, engine='pyarrow', dtype_backend='pyarrow')
 print(f"✓ Loaded {len(df):,} records from {data_file.name}")
 print(f"  Features: {len(df.columns)}")
 print()
@@ -49,8 +51,8 @@ target = 'avg_agi'
 exclude_cols = ['zipcode', 'state', 'state_fips', target]
 feature_cols = [col for col in df.columns if col not in exclude_cols]
 
-X = df[feature_cols].copy()
-y = df[target].copy()
+X = df[feature_cols].astype(np.float32)
+y = df[target].astype(np.float64)
 
 print(f"Target variable: {target}")
 print(f"Number of features: {len(feature_cols)}")